@@ -1,9 +1,11 @@
 import asyncio
 from enum import StrEnum
+from pathlib import Path
 
 from app.core.settings import LogLevel, Settings
 from app.core.workers_factory import WorkersFactory
 from app.dependencies.dependency_container import DependencyContainer
+from app.services.replay import Replayer
 from app.workers.workers_manager import WorkersManger
 
 
@@ -26,7 +28,13 @@ class AppFactory:
     def configure_dependency_container(self) -> None:
         log_level: LogLevel = self.settings.logger.log_level
         DependencyContainer.configure_logger(log_level)
-        DependencyContainer.configure_neo4j(self.settings.graph_db)
+        DependencyContainer.configure_graph_db(self.settings.graph_db)
+        DependencyContainer.configure_write_buffer(self.settings.write_buffer)
+        DependencyContainer.configure_retry_policy(self.settings.retry)
+        DependencyContainer.configure_redirects(self.settings.redirects)
+        DependencyContainer.configure_resilience(self.settings.resilience)
+        DependencyContainer.configure_crawl(self.settings.crawl)
+        DependencyContainer.configure_capture(self.settings.capture)
 
         self._dependency_container = DependencyContainer()
 
@@ -37,6 +45,7 @@ class AppFactory:
         workers_factory = WorkersFactory(
             container=self._dependency_container,
             num_page_workers=self.settings.app.num_page_workers,
+            metrics_interval=self.settings.app.metrics_interval,
         )
         workers_factory.configure()
         self._workers_manger: WorkersManger = workers_factory.workers_manger
@@ -51,4 +60,36 @@ class AppFactory:
         self._dependency_container.logger.info("Application is starting!")
         loop = asyncio.get_event_loop()
 
-        loop.run_until_complete(self._workers_manger.run())
+        try:
+            loop.run_until_complete(self._workers_manger.run())
+        finally:
+            loop.run_until_complete(self._dependency_container.close())
+
+    def export(self, output_dir: str) -> None:
+        if not self._dependency_container:
+            raise ValueError(ConfigurationsError.container_is_not_defined)
+
+        self._dependency_container.logger.info("Graph export to '%s' is starting!", output_dir)
+        loop = asyncio.get_event_loop()
+
+        try:
+            for directory, exporter in self._dependency_container.graph_exporters.items():
+                loop.run_until_complete(exporter.export(Path(output_dir) / directory))
+        finally:
+            loop.run_until_complete(self._dependency_container.close())
+
+    def replay(self, capture_dir: str) -> None:
+        if not self._dependency_container:
+            raise ValueError(ConfigurationsError.container_is_not_defined)
+
+        self._dependency_container.logger.info("Replay of '%s' is starting!", capture_dir)
+        replayer = Replayer(
+            editions=self._dependency_container.editions,
+            logger=self._dependency_container.logger,
+        )
+        loop = asyncio.get_event_loop()
+
+        try:
+            loop.run_until_complete(replayer.replay(capture_dir))
+        finally:
+            loop.run_until_complete(self._dependency_container.close())
@@ -3,6 +3,7 @@ from pydantic_settings import SettingsConfigDict
 from typing_extensions import Literal
 
 type LogLevel = Literal["TRACE", "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+type GraphDBBackend = Literal["neo4j", "sqlite"]
 
 
 class BaseSettings(BaseSettingsPydantic):
@@ -23,13 +24,65 @@ class GraphDBConfig(BaseSettings):
     graph_db_user: str = ""
     graph_db_password: str = ""
     graph_db_name: str = "neo4j"
+    graph_db_backend: GraphDBBackend = "neo4j"
+    graph_db_sqlite_path: str = "wiki_graph.sqlite3"
+    graph_db_slow_query_threshold: float = 1.0
+    graph_db_profile_sample_rate: float = 0.1
 
 
 class AppConfig(BaseSettings):
     num_page_workers: int = 4
+    metrics_interval: float = 60.0
+
+
+class CrawlConfig(BaseSettings):
+    # Языковой раздел -> стартовая страница. Пример: '{"ru": "Философия", "en": "Philosophy"}'.
+    # Первый раздел хранится под меткой `Page` и в `graph_db_sqlite_path`,
+    # остальные - под меткой `Page_<язык>` и в `<graph_db_sqlite_path>.<язык>`.
+    # Выгрузка (export.py) пишет первый раздел в `<output_dir>`, остальные - в `<output_dir>/<язык>`.
+    crawl_languages: dict[str, str] = {"ru": "Философия"}
+    crawl_rate_limit: float = 20.0
+    crawl_max_connections: int = 10
+
+
+class WriteBufferConfig(BaseSettings):
+    write_buffer_max_rows: int = 5000
+    write_buffer_flush_interval: float = 0.5
+    write_batch_initial_size: int = 500
+    write_batch_min_size: int = 50
+    write_batch_max_size: int = 10_000
+    write_batch_target_latency: float = 0.5
+    write_max_concurrency: int = 2
+
+
+class RetryConfig(BaseSettings):
+    retry_max_attempts: int = 5
+    retry_base_delay: float = 30.0
+    retry_max_delay: float = 3600.0
+
+
+class RedirectsConfig(BaseSettings):
+    redirects_cache_size: int = 1_000_000
+
+
+class ResilienceConfig(BaseSettings):
+    breaker_failure_threshold: int = 5
+    breaker_recovery_timeout: float = 30.0
+
+
+class CaptureConfig(BaseSettings):
+    capture_enabled: bool = False
+    capture_dir: str = "captures"
+    capture_segment_size: int = 64 * 1024 * 1024
 
 
 class Settings(BaseSettings):
     app: AppConfig = AppConfig()
+    crawl: CrawlConfig = CrawlConfig()
     logger: LoggerConfig = LoggerConfig()
     graph_db: GraphDBConfig = GraphDBConfig()
+    write_buffer: WriteBufferConfig = WriteBufferConfig()
+    retry: RetryConfig = RetryConfig()
+    redirects: RedirectsConfig = RedirectsConfig()
+    resilience: ResilienceConfig = ResilienceConfig()
+    capture: CaptureConfig = CaptureConfig()
@@ -1,5 +1,7 @@
 from app.dependencies.dependency_container import DependencyContainer
+from app.workers.flush_worker import FlushWorker
 from app.workers.init_worker import InitWorker
+from app.workers.metrics_worker import MetricsWorker
 from app.workers.page_worker import PageWorker
 from app.workers.workers_manager import WorkersManger
 
@@ -7,9 +9,10 @@ from app.workers.workers_manager import WorkersManger
 class WorkersFactory:
     _workers_manger: WorkersManger | None = None
 
-    def __init__(self, container: DependencyContainer, num_page_workers: int) -> None:
+    def __init__(self, container: DependencyContainer, num_page_workers: int, metrics_interval: float = 60.0) -> None:
         self._container = container
         self._num_page_workers = num_page_workers
+        self._metrics_interval = metrics_interval
 
     @property
     def workers_manger(self) -> WorkersManger:
@@ -20,12 +23,22 @@ class WorkersFactory:
     def configure(self) -> None:
         self._configure_init_worker()
         self._configure_page_workers()
+        self._configure_flush_worker()
+        self._configure_metrics_worker()
 
     def _configure_init_worker(self) -> None:
         worker = InitWorker(self._container)
         self.workers_manger.registry_init_worker(worker)
 
     def _configure_page_workers(self) -> None:
-        for _ in range(self._num_page_workers):
-            worker = PageWorker(self._container)
+        for offset in range(self._num_page_workers):
+            worker = PageWorker(self._container, offset=offset)
             self.workers_manger.registry_worker(worker)
+
+    def _configure_flush_worker(self) -> None:
+        worker = FlushWorker(self._container, metrics_interval=self._metrics_interval)
+        self.workers_manger.registry_worker(worker)
+
+    def _configure_metrics_worker(self) -> None:
+        worker = MetricsWorker(self._container, interval=self._metrics_interval)
+        self.workers_manger.registry_worker(worker)
@@ -1,22 +1,54 @@
 from logging import Logger
+from pathlib import Path
 
-from app.core.settings import GraphDBConfig
+from app.core.settings import (
+    CaptureConfig,
+    CrawlConfig,
+    GraphDBBackend,
+    GraphDBConfig,
+    RedirectsConfig,
+    ResilienceConfig,
+    RetryConfig,
+    WriteBufferConfig,
+)
+from app.dependencies.editions import WikiEdition
 from app.dependencies.fetchers import FetchersContainer
-from app.dependencies.services.http_client import HttpClient
+from app.dependencies.services.http_client import HttpClient, HttpClientConfig
 from app.dependencies.services.logger import LogLevel, get_logger
+from app.dependencies.services.neo4j.exporter import GraphExporter
 from app.dependencies.services.neo4j.neo4j_connection import Neo4jConfig, Neo4jConnection
 from app.dependencies.services.neo4j.repository import GraphRepositoryContainer
+from app.dependencies.services.sqlite.repository import SQLiteRepositoryContainer
+from app.dependencies.services.sqlite.sqlite_connection import SQLiteConfig, SQLiteConnection
+from app.services.batch_size import AdaptiveBatchSize
+from app.services.capture import CaptureLog
+from app.services.rate_limit import RateLimiter
+from app.services.redirects import RedirectResolver
+from app.services.retries import CircuitBreakers, RetryPolicy
+from app.services.write_buffer import FlushPolicy, PageWriteBuffer
 
 
 class DependencyContainer:
+    _SQLITE_BACKEND: GraphDBBackend = "sqlite"
+
     _log_level: LogLevel = "INFO"
+    _graph_db_backend: GraphDBBackend = "neo4j"
     _neo4j_config: Neo4jConfig | None = None
+    _sqlite_config: SQLiteConfig | None = None
+    _write_buffer_config: WriteBufferConfig = WriteBufferConfig()
+    _retry_config: RetryConfig = RetryConfig()
+    _redirects_config: RedirectsConfig = RedirectsConfig()
+    _resilience_config: ResilienceConfig = ResilienceConfig()
+    _crawl_config: CrawlConfig = CrawlConfig()
+    _capture_config: CaptureConfig = CaptureConfig()
 
     _logger: Logger | None = None
     _neo4j_connection: Neo4jConnection | None = None
-    _graph_repository_container: GraphRepositoryContainer | None = None
-    _http_client: HttpClient | None = None
-    _fetchers_container: FetchersContainer | None = None
+    _sqlite_connections: dict[str, SQLiteConnection] | None = None
+    _editions: list[WikiEdition] | None = None
+    _retry_policy: RetryPolicy | None = None
+    _graph_exporters: dict[str, GraphExporter] | None = None
+    _circuit_breakers: CircuitBreakers | None = None
 
     @classmethod
     def configure_logger(cls, log_level: LogLevel) -> None:
@@ -29,8 +61,43 @@ class DependencyContainer:
             user=graph_db_config.graph_db_user,
             password=graph_db_config.graph_db_password,
             db_name=graph_db_config.graph_db_name,
+            slow_query_threshold=graph_db_config.graph_db_slow_query_threshold,
+            profile_sample_rate=graph_db_config.graph_db_profile_sample_rate,
         )
 
+    @classmethod
+    def configure_graph_db(cls, graph_db_config: GraphDBConfig) -> None:
+        cls._graph_db_backend = graph_db_config.graph_db_backend
+
+        if cls._graph_db_backend == cls._SQLITE_BACKEND:
+            cls._sqlite_config = SQLiteConfig(path=graph_db_config.graph_db_sqlite_path)
+        else:
+            cls.configure_neo4j(graph_db_config)
+
+    @classmethod
+    def configure_write_buffer(cls, write_buffer_config: WriteBufferConfig) -> None:
+        cls._write_buffer_config = write_buffer_config
+
+    @classmethod
+    def configure_retry_policy(cls, retry_config: RetryConfig) -> None:
+        cls._retry_config = retry_config
+
+    @classmethod
+    def configure_redirects(cls, redirects_config: RedirectsConfig) -> None:
+        cls._redirects_config = redirects_config
+
+    @classmethod
+    def configure_resilience(cls, resilience_config: ResilienceConfig) -> None:
+        cls._resilience_config = resilience_config
+
+    @classmethod
+    def configure_crawl(cls, crawl_config: CrawlConfig) -> None:
+        cls._crawl_config = crawl_config
+
+    @classmethod
+    def configure_capture(cls, capture_config: CaptureConfig) -> None:
+        cls._capture_config = capture_config
+
     @property
     def logger(self) -> Logger:
         if not self._logger:
@@ -38,13 +105,24 @@ class DependencyContainer:
         return self._logger
 
     @property
-    def graph_repository_container(self) -> GraphRepositoryContainer:
-        if not self._graph_repository_container:
-            self._graph_repository_container = GraphRepositoryContainer(
-                connection=self.neo4j_connection,  # type: ignore
-                logger=self.logger,
+    def editions(self) -> list[WikiEdition]:
+        if not self._editions:
+            languages = self._crawl_config.crawl_languages
+            self._editions = [
+                self._build_edition(language, start_page, primary=index == 0)
+                for index, (language, start_page) in enumerate(languages.items())
+            ]
+        return self._editions
+
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        if not self._retry_policy:
+            self._retry_policy = RetryPolicy(
+                max_attempts=self._retry_config.retry_max_attempts,
+                base_delay=self._retry_config.retry_base_delay,
+                max_delay=self._retry_config.retry_max_delay,
             )
-        return self._graph_repository_container
+        return self._retry_policy
 
     @property
     def neo4j_connection(self) -> Neo4jConnection:
@@ -54,20 +132,133 @@ class DependencyContainer:
                 msg = "'neo4j' is not configured! Call 'DependencyContainer.configure_neo4j' method."
                 raise ValueError(msg)
 
-            self._neo4j_connection = Neo4jConnection(neo4j_config=self._neo4j_config, logger=self.logger)
+            self._neo4j_connection = Neo4jConnection(
+                neo4j_config=self._neo4j_config,
+                logger=self.logger,
+                circuit_breaker=self.circuit_breakers.get("neo4j"),
+            )
         return self._neo4j_connection
 
-    @property
-    def fetchers_container(self) -> FetchersContainer:
-        if not self._fetchers_container:
-            self._fetchers_container = FetchersContainer(
-                http_client=self.http_client,  # type: ignore
+    def sqlite_connection(self, language: str, *, primary: bool) -> SQLiteConnection:
+        if self._sqlite_connections is None:
+            self._sqlite_connections = {}
+
+        if language not in self._sqlite_connections:
+
+            if not self._sqlite_config:
+                msg = "'sqlite' is not configured! Call 'DependencyContainer.configure_graph_db' method."
+                raise ValueError(msg)
+
+            path = Path(self._sqlite_config.path)
+            if not primary:
+                path = path.with_name(f"{path.name}.{language}")
+
+            self._sqlite_connections[language] = SQLiteConnection(
+                sqlite_config=SQLiteConfig(path=str(path)),
                 logger=self.logger,
             )
-        return self._fetchers_container
+        return self._sqlite_connections[language]
 
     @property
-    def http_client(self) -> HttpClient:
-        if not self._http_client:
-            self._http_client = HttpClient()
-        return self._http_client
+    def graph_exporters(self) -> dict[str, GraphExporter]:
+        """Выгрузчики графов языковых разделов по поддиректории выгрузки: `.` у первого раздела, иначе язык."""
+        if not self._graph_exporters:
+            languages = self._crawl_config.crawl_languages
+            self._graph_exporters = {
+                "." if index == 0 else language: GraphExporter(
+                    connection=self.neo4j_connection,
+                    logger=self.logger,
+                    label=self._graph_label(language, primary=index == 0),
+                )
+                for index, language in enumerate(languages)
+            }
+        return self._graph_exporters
+
+    @property
+    def circuit_breakers(self) -> CircuitBreakers:
+        if not self._circuit_breakers:
+            self._circuit_breakers = CircuitBreakers(
+                logger=self.logger,
+                failure_threshold=self._resilience_config.breaker_failure_threshold,
+                recovery_timeout=self._resilience_config.breaker_recovery_timeout,
+            )
+        return self._circuit_breakers
+
+    @staticmethod
+    def _graph_label(language: str, *, primary: bool) -> str:
+        return "Page" if primary else f"Page_{language.replace('-', '_')}"
+
+    def _build_edition(self, language: str, start_page: str, *, primary: bool) -> WikiEdition:
+        http_client = HttpClient(
+            config=HttpClientConfig(max_connections=self._crawl_config.crawl_max_connections),
+            circuit_breaker=self.circuit_breakers.get(f"{language}.wikipedia.org"),
+            rate_limiter=RateLimiter(rate=self._crawl_config.crawl_rate_limit),
+        )
+        capture_log = None
+        if self._capture_config.capture_enabled:
+            capture_log = CaptureLog(
+                directory=Path(self._capture_config.capture_dir) / language,
+                segment_size=self._capture_config.capture_segment_size,
+            )
+
+        wiki_fetchers = FetchersContainer(
+            http_client=http_client,  # type: ignore
+            logger=self.logger,
+            language=language,
+            capture_log=capture_log,
+        ).wiki_fetchers
+
+        graph_repository_container: GraphRepositoryContainer | SQLiteRepositoryContainer
+        if self._graph_db_backend == self._SQLITE_BACKEND:
+            graph_repository_container = SQLiteRepositoryContainer(
+                connection=self.sqlite_connection(language, primary=primary),
+                logger=self.logger,
+            )
+        else:
+            graph_repository_container = GraphRepositoryContainer(
+                connection=self.neo4j_connection,  # type: ignore
+                logger=self.logger,
+                label=self._graph_label(language, primary=primary),
+                write_concurrency=self._write_buffer_config.write_max_concurrency,
+            )
+        page_repository = graph_repository_container.page_repository
+
+        return WikiEdition(
+            language=language,
+            start_page=start_page,
+            http_client=http_client,
+            wiki_fetchers=wiki_fetchers,
+            redirect_resolver=RedirectResolver(
+                fetcher=wiki_fetchers,
+                logger=self.logger,
+                cache_size=self._redirects_config.redirects_cache_size,
+                capture_log=capture_log,
+            ),
+            page_repository=page_repository,
+            write_buffer=PageWriteBuffer(
+                page_repository=page_repository,
+                logger=self.logger,
+                policy=FlushPolicy(
+                    max_rows=self._write_buffer_config.write_buffer_max_rows,
+                    flush_interval=self._write_buffer_config.write_buffer_flush_interval,
+                    max_concurrency=self._write_buffer_config.write_max_concurrency,
+                ),
+                batch_size=AdaptiveBatchSize(
+                    initial_size=self._write_buffer_config.write_batch_initial_size,
+                    min_size=self._write_buffer_config.write_batch_min_size,
+                    max_size=self._write_buffer_config.write_batch_max_size,
+                    target_latency=self._write_buffer_config.write_batch_target_latency,
+                ),
+            ),
+            capture_log=capture_log,
+        )
+
+    async def close(self) -> None:
+        for edition in self._editions or []:
+            await edition.close()
+
+        if self._neo4j_connection:
+            await self._neo4j_connection.close()
+
+        for sqlite_connection in (self._sqlite_connections or {}).values():
+            await sqlite_connection.close()
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from typing_extensions import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.dependencies.fetchers import WikiFetchers
+    from app.dependencies.services.http_client import HttpClient
+    from app.dependencies.services.neo4j.repository import PageRepository
+    from app.dependencies.services.sqlite.repository import SQLitePageRepository
+    from app.services.capture import CaptureLog
+    from app.services.redirects import RedirectResolver
+    from app.services.write_buffer import PageWriteBuffer
+
+
+@dataclass
+class WikiEdition:
+    """Зависимости одного языкового раздела Википедии: свой хост, пул соединений и граф."""
+
+    language: str
+    start_page: str
+    http_client: HttpClient
+    wiki_fetchers: WikiFetchers
+    redirect_resolver: RedirectResolver
+    page_repository: PageRepository | SQLitePageRepository
+    write_buffer: PageWriteBuffer
+    capture_log: CaptureLog | None = None
+
+    async def close(self) -> None:
+        await self.write_buffer.close()
+        await self.http_client.close()
+
+        if self.capture_log is not None:
+            await self.capture_log.close()
@@ -5,6 +5,8 @@ from typing_extensions import TYPE_CHECKING, Protocol
 if TYPE_CHECKING:
     from logging import Logger
 
+    from app.services.capture import CaptureLog
+
 type HTMLString = str
 
 
@@ -53,14 +55,27 @@ class HttpClient(Protocol):
 class FetchersContainer:
     _wiki_fetchers: WikiFetchers | None = None
 
-    def __init__(self, http_client: HttpClient, logger: Logger) -> None:
+    def __init__(
+            self,
+            http_client: HttpClient,
+            logger: Logger,
+            language: str = "ru",
+            capture_log: CaptureLog | None = None,
+    ) -> None:
         self._http_client = http_client
         self._logger = logger
+        self._language = language
+        self._capture_log = capture_log
 
     @property
     def wiki_fetchers(self) -> WikiFetchers:
         if not self._wiki_fetchers:
-            self._wiki_fetchers = WikiFetchers(http_client=self._http_client, logger=self._logger)
+            self._wiki_fetchers = WikiFetchers(
+                http_client=self._http_client,
+                logger=self._logger,
+                language=self._language,
+                capture_log=self._capture_log,
+            )
         return self._wiki_fetchers
 
 
@@ -76,11 +91,21 @@ class Fetchers:  # noqa B903
 
 
 class WikiFetchers(Fetchers):
-    _BASE_URL = "https://ru.wikipedia.org/"
+    _BASE_URL_TEMPLATE = "https://{language}.wikipedia.org/"
 
     _WIKI_PAGE_PATH = "wiki/"
+    _API_PATH = "w/api.php"
 
-    def __init__(self, http_client: HttpClient, logger: Logger) -> None:
+    def __init__(
+            self,
+            http_client: HttpClient,
+            logger: Logger,
+            language: str = "ru",
+            capture_log: CaptureLog | None = None,
+    ) -> None:
+        self.language = language
+        self._capture_log = capture_log
+        self._BASE_URL = self._BASE_URL_TEMPLATE.format(language=language)
         http_client.base_url = self._BASE_URL
         super().__init__(http_client, logger)
 
@@ -94,6 +119,56 @@ class WikiFetchers(Fetchers):
             return None
         else:
             if isinstance(html, str):
+                if self._capture_log is not None:
+                    await self._capture_log.append(page_name, html)
                 return html
             self._logger.warning("Wikipedia page '%s' is not string. Out: %s", page_name, html)
         return None
+
+    async def fetch_redirects(self, titles: list[str]) -> dict[str, str] | None:
+        r"""
+        Разрешает редиректы для списка заголовков одним запросом к API (`redirects=1`).
+
+        :param titles: Заголовки страниц. Не более 50 за запрос.
+        :return: Отображение исходного заголовка в заголовок конечной статьи
+                 (с учётом нормализации) \ Ничего, если запрос не удался.
+        """
+        url = self._build_page_url(self._API_PATH)
+        params = {
+            "action": "query",
+            "redirects": "1",
+            "format": "json",
+            "formatversion": "2",
+            "titles": "|".join(titles),
+        }
+
+        try:
+            response: dict | str = await self._http_client.get(url=url, params=params)
+        except (TimeoutError, RuntimeError):
+            self._logger.exception("Redirects lookup for %d titles failed.", len(titles))
+            return None
+
+        if not isinstance(response, dict):
+            self._logger.warning("Redirects lookup response is not JSON. Out: %s", response)
+            return None
+
+        return self._parse_redirects(titles, response)
+
+    @staticmethod
+    def _parse_redirects(titles: list[str], response: dict) -> dict[str, str]:
+        """
+        Применяет к заголовкам карты `normalized` и `redirects` из ответа API.
+
+        :param titles: Запрошенные заголовки.
+        :param response: Ответ API в формате `formatversion=2`.
+        :return: Отображение исходного заголовка в заголовок конечной статьи.
+        """
+        query: dict = response.get("query", {})
+        normalized = {item["from"]: item["to"] for item in query.get("normalized", [])}
+        redirects = {item["from"]: item["to"] for item in query.get("redirects", [])}
+
+        resolved: dict[str, str] = {}
+        for title in titles:
+            normalized_title = normalized.get(title, title)
+            resolved[title] = redirects.get(normalized_title, normalized_title)
+        return resolved
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
 import asyncio
+from dataclasses import dataclass
 from enum import StrEnum
 
 import aiohttp
-from tenacity import AsyncRetrying, RetryError, retry_if_exception_type, stop_after_attempt, wait_fixed
+from tenacity import AsyncRetrying, RetryCallState, RetryError, retry_if_exception_type, stop_after_attempt
+from typing_extensions import TYPE_CHECKING
+
+from app.services.retries import full_jitter_backoff
+
+if TYPE_CHECKING:
+    from app.services.rate_limit import RateLimiter
+    from app.services.retries import CircuitBreaker
 
 
 class HttpClientErrors(StrEnum):
@@ -13,30 +21,58 @@ class HttpClientErrors(StrEnum):
     POST_REQUEST_TIMEOUT = "Post request was not executed due to a timeout. URL: {url}"
 
 
+@dataclass
+class HttpClientConfig:
+    """
+    Параметры запросов клиента.
+
+    :param timeout: Тайм-аут запроса в секундах. Если он не указан, используется тайм-аут по умолчанию.
+    :param max_retries: Максимальное количество повторных попыток.
+    :param retry_wait: Базовое время ожидания между повторными попытками в секундах.
+                       Задержка растёт экспоненциально со случайным джиттером.
+    :param max_retry_wait: Максимальное время ожидания между повторными попытками в секундах.
+    :param max_connections: Размер пула соединений. Пул общий для всех запросов клиента.
+    """
+
+    timeout: int | None = None
+    max_retries: int = 1
+    retry_wait: float = 5.0
+    max_retry_wait: float = 60.0
+    max_connections: int = 100
+
+
 class HttpClient:
     def __init__(
         self,
         base_url: str | None = None,
         headers: dict[str, str] | None = None,
-        timeout: int | None = None,
-        max_retries: int = 1,
-        retry_wait: float = 5.0,
+        config: HttpClientConfig | None = None,
+        *,
+        circuit_breaker: CircuitBreaker | None = None,
+        rate_limiter: RateLimiter | None = None,
     ) -> None:
         """
-        Инициализируйте клиент с помощью необязательных заголовков, базового URL-адреса и тайм-аута.
+        Инициализируйте клиент с помощью необязательных заголовков, базового URL-адреса и параметров запросов.
 
         :param base_url: Необязательный базовый URL-адрес, который будет использоваться для всех запросов.
         :param headers: Необязательные заголовки, которые будут добавляться ко всем HTTP-запросам. Должен быть словарь.
-        :param timeout: Необязательный тайм-аут для запросов в секундах.
-                        Если он не указан, используется тайм-аут по умолчанию.
-        :param max_retries: Максимальное количество повторных попыток.
-        :param retry_wait: Время ожидания между повторными попытками измеряется в секундах.
+        :param config: Тайм-аут, повторные попытки и размер пула соединений. По умолчанию `HttpClientConfig()`.
+        :param circuit_breaker: Необязательный предохранитель. Когда он разомкнут,
+                                запросы сразу завершаются ошибкой `CircuitOpenError`.
+        :param rate_limiter: Необязательный ограничитель частоты запросов.
         """
+        config = config or HttpClientConfig()
+
         self.base_url = base_url
         self.headers = headers or {}
-        self.timeout = timeout
-        self.max_retries = max_retries
-        self.retry_wait = retry_wait
+        self.timeout = config.timeout
+        self.max_retries = config.max_retries
+        self.retry_wait = config.retry_wait
+        self.max_retry_wait = config.max_retry_wait
+        self.max_connections = config.max_connections
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self._session: aiohttp.ClientSession | None = None
 
     @staticmethod
     async def fetch(
@@ -79,7 +115,7 @@ class HttpClient:
         """
         retry_strategy = AsyncRetrying(
             stop=stop_after_attempt(self.max_retries),
-            wait=wait_fixed(self.retry_wait),
+            wait=self._retry_wait,
             retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)),
             reraise=True,
         )
@@ -106,10 +142,49 @@ class HttpClient:
         :param url: URL-адрес, по которому выполняется запрос.
         :param request_kwargs: Дополнительные аргументы для запроса.
         :return: Ответ в формате JSON или текстовый ответ в зависимости от типа содержимого.
+        :raises CircuitOpenError: Если предохранитель разомкнут.
         """
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            async with asyncio.timeout(self.timeout):
-                return await self.fetch(session, method, url, **request_kwargs)  # type: ignore
+        if self.circuit_breaker is None:
+            return await self._send_request(method, url, **request_kwargs)
+
+        async with self.circuit_breaker.protect(self._is_dependency_failure):
+            return await self._send_request(method, url, **request_kwargs)
+
+    async def _send_request(
+        self,
+        method: str,
+        url: str,
+        **request_kwargs: dict | str | None,
+    ) -> dict | str:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+
+        async with asyncio.timeout(self.timeout):
+            return await self.fetch(self._get_session(), method, url, **request_kwargs)  # type: ignore
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Закрывает пул соединений."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _retry_wait(self, retry_state: RetryCallState) -> float:
+        return full_jitter_backoff(retry_state.attempt_number - 1, self.retry_wait, self.max_retry_wait)
+
+    @staticmethod
+    def _is_dependency_failure(error: Exception) -> bool:
+        """Ответы 4xx означают, что сервер доступен, и не размыкают предохранитель."""
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status >= 500  # noqa: PLR2004
+        return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
 
     async def get(
             self,
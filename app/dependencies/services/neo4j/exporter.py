@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+from typing_extensions import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+    from logging import Logger
+
+
+class StreamingConnection(Protocol):
+    def iter_query(
+            self,
+            query: str,
+            parameters: dict | None = None,
+            fetch_size: int = 1000,
+            batch_size: int = 1000,
+            name: str | None = None,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Выполняет запрос и отдаёт результат пачками.
+
+        :param query: Запрос.
+        :param parameters: Параметры запроса.
+        :param fetch_size: Сколько записей драйвер запрашивает у сервера за раз.
+        :param batch_size: Размер отдаваемой пачки.
+        :param name: Стабильное имя запроса для статистики.
+        """
+
+
+@dataclass(frozen=True, slots=True)
+class _ChunkKind:
+    """
+    Вид выгружаемых чанков.
+
+    :param skip_empty: Не записывать строки, в которых второй столбец пуст (страницы без связей).
+    """
+
+    name: str
+    query: str
+    columns: tuple[str, str]
+    key_column: str
+    skip_empty: bool = False
+
+    def rows(self, batch: list[dict]) -> list[tuple]:
+        first, second = self.columns
+        return [(row[first], row[second]) for row in batch if not self.skip_empty or row[second] is not None]
+
+
+class GraphExporter:
+    """
+    Выгружает страницы и связи в gzip-CSV файлы-чанки с постоянным расходом памяти.
+
+    Страницы читаются постранично по ключу `title` (keyset pagination). После каждого
+    записанного чанка в `export_state.json` сохраняется последний заголовок, поэтому
+    прерванную выгрузку можно продолжить с того же места.
+    Выгружается граф одного языкового раздела - узлы с меткой `label`.
+    """
+
+    _NODES = _ChunkKind(
+        name="nodes",
+        query="""MATCH (p:Page) WHERE p.title > $after
+                 RETURN p.title AS title, p.status AS status
+                 ORDER BY p.title LIMIT $limit""",
+        columns=("title", "status"),
+        key_column="title",
+    )
+
+    _EDGES = _ChunkKind(
+        name="edges",
+        query="""MATCH (p:Page) WHERE p.title > $after
+                 WITH p ORDER BY p.title LIMIT $limit
+                 OPTIONAL MATCH (p)-[:link]->(t:Page)
+                 RETURN p.title AS source, t.title AS target""",
+        columns=("source", "target"),
+        key_column="source",
+        skip_empty=True,
+    )
+
+    _STATE_FILE = "export_state.json"
+
+    def __init__(
+            self,
+            connection: StreamingConnection,
+            logger: Logger,
+            label: str = "Page",
+            chunk_size: int = 100_000,
+    ) -> None:
+        self._connection = connection
+        self._logger = logger
+        self._label = label
+        self._chunk_size = chunk_size
+
+    def _labeled(self, query: str) -> str:
+        return query.replace(":Page", f":{self._label}")
+
+    async def export(self, output_dir: str | Path) -> None:
+        """
+        Выгружает страницы (`nodes-*.csv.gz`) и связи (`edges-*.csv.gz`) в директорию.
+
+        :param output_dir: Директория для чанков и файла состояния. Создаётся при необходимости.
+        """
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        for kind in (self._NODES, self._EDGES):
+            while await self._export_chunk(output_path, kind):
+                pass
+
+    async def _export_chunk(self, output_path: Path, kind: _ChunkKind) -> bool:
+        """
+        Потоково записывает один чанк во временный файл и фиксирует его вместе с состоянием.
+
+        :return: Был ли записан чанк. `False` означает, что выгрузка этого вида завершена.
+        """
+        state = self._load_state(output_path, kind.name)
+        chunk_path = output_path / f"{kind.name}-{state['chunk']:05d}.csv.gz"
+        tmp_path = chunk_path.with_suffix(".tmp")
+
+        last_key, num_rows = await self._write_chunk(tmp_path, kind, after=state["after"])
+
+        if last_key is None:
+            tmp_path.unlink()
+            return False
+
+        tmp_path.replace(chunk_path)
+        self._save_state(output_path, kind.name, {"after": last_key, "chunk": state["chunk"] + 1})
+
+        self._logger.info("Exported %d %s to '%s'.", num_rows, kind.name, chunk_path)
+        return True
+
+    async def _write_chunk(self, path: Path, kind: _ChunkKind, after: str) -> tuple[str | None, int]:
+        """
+        Записывает в gzip-CSV до `chunk_size` страниц, следующих за `after`.
+
+        :return: Последний выгруженный заголовок (ничего, если страниц не осталось) и число записанных строк.
+        """
+        last_key: str | None = None
+        num_rows = 0
+
+        with gzip.open(path, "wt", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(kind.columns)
+
+            async for batch in self._connection.iter_query(
+                self._labeled(kind.query),
+                parameters={"after": after, "limit": self._chunk_size},
+                name=f"export_{kind.name}",
+            ):
+                rows = kind.rows(batch)
+                writer.writerows(rows)
+
+                num_rows += len(rows)
+                last_key = max(last_key or "", *(row[kind.key_column] for row in batch))
+
+        return last_key, num_rows
+
+    def _load_state(self, output_path: Path, kind: str) -> dict:
+        state_path = output_path / self._STATE_FILE
+        states: dict = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+        return states.get(kind, {"after": "", "chunk": 0})
+
+    def _save_state(self, output_path: Path, kind: str, state: dict) -> None:
+        state_path = output_path / self._STATE_FILE
+        states: dict = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+        states[kind] = state
+
+        tmp_path = state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(states, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(state_path)
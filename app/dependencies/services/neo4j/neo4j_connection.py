@@ -1,7 +1,17 @@
-from dataclasses import dataclass
+import asyncio
+import hashlib
+import random
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
 from logging import Logger
 
-from neo4j import AsyncDriver, AsyncGraphDatabase
+from neo4j import AsyncDriver, AsyncGraphDatabase, AsyncResult, AsyncSession, ResultSummary
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
+
+from app.services.retries import CircuitBreaker, CircuitOpenError
+
+_DEFAULT_FETCH_SIZE = 1000
 
 
 @dataclass
@@ -10,15 +20,54 @@ class Neo4jConfig:
     user: str
     password: str
     db_name: str
+    slow_query_threshold: float = 1.0
+    profile_sample_rate: float = 0.1
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_time: float = 0.0
+    server_time: float = 0.0
+    max_time: float = 0.0
+    slow_count: int = 0
+
+    @property
+    def network_time(self) -> float:
+        return max(self.total_time - self.server_time, 0.0)
+
+    def add(self, elapsed: float, server_time: float, *, slow: bool) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.server_time += server_time
+        self.max_time = max(self.max_time, elapsed)
+        if slow:
+            self.slow_count += 1
+
+
+@dataclass
+class _QueryTiming:
+    name: str
+    started_at: float = field(default_factory=time.perf_counter)
 
 
 class Neo4jConnection:
+    _READ_QUERY_TYPE = "r"
+
     _driver: AsyncDriver | None = None
 
-    def __init__(self, neo4j_config: Neo4jConfig, logger: Logger) -> None:
+    def __init__(
+            self,
+            neo4j_config: Neo4jConfig,
+            logger: Logger,
+            circuit_breaker: CircuitBreaker | None = None,
+    ) -> None:
         self.neo4j_config = neo4j_config
         self.logger = logger
         self.db_name = neo4j_config.db_name
+        self.circuit_breaker = circuit_breaker
+        self.query_stats: dict[str, QueryStats] = {}
+        self._profile_tasks: set[asyncio.Task] = set()
 
     @property
     def driver(self) -> AsyncDriver:
@@ -30,22 +79,196 @@ class Neo4jConnection:
         return self._driver
 
     async def close(self) -> None:
+        await self._cancel_profiling()
+        self.log_query_stats()
+
         if self.driver is not None:
             await self.driver.close()
 
-    async def query(self, query: str, parameters: dict[str, str] | None = None) -> list[dict]:
-        session = None
+    def log_query_stats(self) -> None:
+        for name, stats in sorted(self.query_stats.items(), key=lambda item: -item[1].total_time):
+            self.logger.info(
+                "Query '%s': %d calls, %d slow, %.3fs total, %.3fs server, %.3fs network, %.3fs max.",
+                name, stats.count, stats.slow_count, stats.total_time, stats.server_time, stats.network_time,
+                stats.max_time,
+            )
+
+    async def _cancel_profiling(self) -> None:
+        """Отменяет фоновые запросы плана, чтобы они не обращались к уже закрытому драйверу."""
+        tasks = list(self._profile_tasks)
+        for task in tasks:
+            task.cancel()
 
-        try:
-            session = self.driver.session(database=self.db_name) if self.db_name is not None else self.driver.session()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-            async_result = await session.run(query, parameters=parameters)
-            result = [res.data() async for res in async_result]
+    def _session(self, fetch_size: int = _DEFAULT_FETCH_SIZE) -> AsyncSession:
+        if self.db_name is not None:
+            return self.driver.session(database=self.db_name, fetch_size=fetch_size)
+        return self.driver.session(fetch_size=fetch_size)
+
+    async def _run(self, session: AsyncSession, query: str, parameters: dict | None) -> AsyncResult:
+        if self.circuit_breaker is None:
+            return await session.run(query, parameters=parameters)
+
+        async with self.circuit_breaker.protect(self._is_dependency_failure):
+            return await session.run(query, parameters=parameters)
+
+    @staticmethod
+    def _is_dependency_failure(error: Exception) -> bool:
+        return isinstance(error, (ServiceUnavailable, SessionExpired, OSError))
+
+    async def query(self, query: str, parameters: dict[str, str] | None = None, name: str | None = None) -> list[dict]:
+        timing = _QueryTiming(name=name or self._default_query_name(query))
+
+        try:
+            async with self._session() as session:
+                async_result = await self._run(session, query, parameters)
+                result = [res.data() async for res in async_result]
+                summary = await async_result.consume()
+        except CircuitOpenError:
+            raise
         except Exception:
-            self.logger.exception("Query '%s' failed. Params: %s", query, parameters)
+            self.logger.exception("Query '%s' failed. Params: %s", query, self._loggable(parameters))
             raise
-        else:
-            return result
-        finally:
-            if session is not None:
-                await session.close()
+
+        self._record_timing(timing, summary, query, parameters)
+        return result
+
+    async def iter_query(
+            self,
+            query: str,
+            parameters: dict | None = None,
+            fetch_size: int = _DEFAULT_FETCH_SIZE,
+            batch_size: int = 1000,
+            name: str | None = None,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Выполняет запрос и отдаёт результат пачками, не загружая его в память целиком.
+
+        Сессия остаётся открытой, пока генератор не будет исчерпан или закрыт.
+
+        :param query: Запрос.
+        :param parameters: Параметры запроса.
+        :param fetch_size: Сколько записей драйвер запрашивает у сервера за раз.
+        :param batch_size: Размер отдаваемой пачки.
+        :param name: Стабильное имя запроса для статистики.
+        """
+        timing = _QueryTiming(name=name or self._default_query_name(query))
+
+        async with self._session(fetch_size=fetch_size) as session:
+            try:
+                async_result = await self._run(session, query, parameters)
+
+                async for batch in self._batches(async_result, batch_size):
+                    yield batch
+
+                summary = await async_result.consume()
+            except CircuitOpenError:
+                raise
+            except Exception:
+                self.logger.exception("Query '%s' failed. Params: %s", query, self._loggable(parameters))
+                raise
+
+        self._record_timing(timing, summary, query, parameters, profile=False)
+
+    @staticmethod
+    def _loggable(parameters: dict | None) -> dict | None:
+        """Параметры запроса для журнала: списки (строки пакетной записи) заменены их длиной."""
+        if parameters is None:
+            return None
+        return {key: f"<{len(value)} rows>" if isinstance(value, list) else value for key, value in parameters.items()}
+
+    @staticmethod
+    async def _batches(async_result: AsyncResult, batch_size: int) -> AsyncIterator[list[dict]]:
+        batch: list[dict] = []
+
+        async for record in async_result:
+            batch.append(record.data())
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def _record_timing(
+            self,
+            timing: _QueryTiming,
+            summary: ResultSummary,
+            query: str,
+            parameters: dict | None,
+            *,
+            profile: bool = True,
+    ) -> None:
+        """
+        Учитывает время запроса. Время сервера берётся из `ResultSummary`, остальное - сеть и драйвер.
+
+        Медленные запросы логируются и с вероятностью `profile_sample_rate` перезапускаются с `PROFILE`.
+        """
+        elapsed = time.perf_counter() - timing.started_at
+        server_time = ((summary.result_available_after or 0) + (summary.result_consumed_after or 0)) / 1000
+
+        slow = elapsed >= self.neo4j_config.slow_query_threshold
+        self.query_stats.setdefault(timing.name, QueryStats()).add(elapsed, server_time, slow=slow)
+
+        if not slow:
+            return
+
+        self.logger.warning(
+            "Slow query '%s': %.3fs total, %.3fs server, %.3fs network.",
+            timing.name, elapsed, server_time, elapsed - server_time,
+        )
+
+        if profile and random.random() < self.neo4j_config.profile_sample_rate:  # noqa: S311
+            task = asyncio.create_task(self._profile(timing.name, query, parameters, summary.query_type))
+            self._profile_tasks.add(task)
+            task.add_done_callback(self._profile_tasks.discard)
+
+    async def _profile(self, name: str, query: str, parameters: dict | None, query_type: str | None) -> None:
+        """
+        Получает план медленного запроса.
+
+        Только читающие запросы (`query_type == "r"`) перезапускаются с `PROFILE`, чтобы получить db hits.
+        Для пишущих используется `EXPLAIN`, который не выполняет запрос повторно.
+        """
+        prefix = "PROFILE" if query_type == self._READ_QUERY_TYPE else "EXPLAIN"
+
+        try:
+            summary = await self._consume(f"{prefix} {query}", parameters)
+        except Exception:
+            self.logger.exception("Failed to %s slow query '%s'.", prefix, name)
+            return
+
+        operators = self._flatten_plan(summary.profile or summary.plan or {})
+        self.logger.warning(
+            "%s of slow query '%s': %d db hits. Operators: %s",
+            prefix, name, sum(operator[1] for operator in operators),
+            "; ".join(f"{operator}(dbHits={hits}, rows={rows})" for operator, hits, rows in operators),
+        )
+
+    async def _consume(self, query: str, parameters: dict | None) -> ResultSummary:
+        async with self._session() as session:
+            async_result = await session.run(query, parameters=parameters)
+            return await async_result.consume()
+
+    @staticmethod
+    def _flatten_plan(plan: dict) -> list[tuple[str, int, int]]:
+        operators: list[tuple[str, int, int]] = []
+        stack = [plan]
+
+        while stack:
+            node = stack.pop()
+            arguments = node.get("args", {})
+            operators.append((
+                node.get("operatorType", "?"),
+                node.get("dbHits", arguments.get("DbHits", 0)),
+                node.get("rows", arguments.get("Rows", 0)),
+            ))
+            stack.extend(node.get("children", []))
+
+        return operators
+
+    @staticmethod
+    def _default_query_name(query: str) -> str:
+        return hashlib.sha1(query.encode()).hexdigest()[:12]  # noqa: S324
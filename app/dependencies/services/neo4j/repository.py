@@ -1,23 +1,31 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from itertools import batched
 
+from neo4j.exceptions import Neo4jError
 from typing_extensions import TYPE_CHECKING, Protocol
 
 from app.models.page import LinkedPages, Page, PageStatus
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
     from logging import Logger
 
-type ParametersValue = str | int | list[PageStatus | str] | PageStatus
+type ParametersValue = str | int | float | list[PageStatus | str] | PageStatus | list[dict[str, str]] | None
 
 
 class Connection(Protocol):
     async def close(self) -> None:
         """Закрывает соединение с базой данных."""
 
-    async def query(self, query: str, parameters: dict[str, ParametersValue] | None = None) -> list[dict]:
+    async def query(
+            self,
+            query: str,
+            parameters: dict[str, ParametersValue] | None = None,
+            name: str | None = None,
+    ) -> list[dict]:
         r"""
         Выполняет запрос к базе данных.
 
@@ -26,6 +34,8 @@ class Connection(Protocol):
 
         :param parameters: Параметры запроса. Пример: {"p1_title": "Философия", "p2_title": "Позитивизм"}
 
+        :param name: Стабильное имя запроса для статистики и журнала медленных запросов.
+
         :return: Результат запроса \ Ничего, если возникла ошибка. Пример:
         [{'p1': {'title': 'Философия'}, 'p2': {'title': 'Позитивизм'}}]
         """
@@ -34,14 +44,21 @@ class Connection(Protocol):
 class GraphRepositoryContainer:
     _page_repository: PageRepository | None = None
 
-    def __init__(self, connection: Connection, logger: Logger) -> None:
+    def __init__(self, connection: Connection, logger: Logger, label: str = "Page", write_concurrency: int = 1) -> None:
         self._connection = connection
         self._logger = logger
+        self._label = label
+        self._write_concurrency = write_concurrency
 
     @property
     def page_repository(self) -> PageRepository:
         if not self._page_repository:
-            self._page_repository = PageRepository(connection=self._connection, logger=self._logger)
+            self._page_repository = PageRepository(
+                connection=self._connection,
+                logger=self._logger,
+                label=self._label,
+                write_concurrency=self._write_concurrency,
+            )
         return self._page_repository
 
 
@@ -52,10 +69,17 @@ class GraphRepository:  # noqa B903
 
 
 class PageRepository(GraphRepository):
-    def __init__(self, connection: Connection, logger: Logger) -> None:
+    def __init__(self, connection: Connection, logger: Logger, label: str = "Page", write_concurrency: int = 1) -> None:
         super().__init__(connection, logger)
+        self._label = label
         self._read_lock = asyncio.Lock()
-        self._write_lock = asyncio.Lock()
+        self._write_semaphore = asyncio.Semaphore(write_concurrency)
+
+    def _labeled(self, query: str) -> str:
+        return query.replace(":Page", f":{self._label}")
+
+    _CREATE_TITLE_CONSTRAINT_QUERY = """CREATE CONSTRAINT %s_title_unique IF NOT EXISTS
+                                        FOR (p:Page) REQUIRE p.title IS UNIQUE"""
 
     _CREATE_ONE_PAGE_QUERY = """MERGE (p:Page {title: $page_title}) ON CREATE SET p.status = $page_status"""
 
@@ -66,79 +90,203 @@ class PageRepository(GraphRepository):
 
     _CREATE_TWO_PAGES_AND_LINK_QUERY = _CREATE_TWO_PAGES_QUERY + """ MERGE (p1)-[l:link]->(p2)"""
 
-    _CREATE_MANY_PAGES_AND_LINKS_QUERY = """
-            MERGE (p%s1:Page {title: $page_title_%s1})
-            MERGE (p%s2:Page {title: $page_title_%s2})
-            ON CREATE SET p%s2.status = $page_status_%s2
-            MERGE (p%s1)-[l%s:link]->(p%s2)
+    _SAVE_LINKS_AND_STATUSES_QUERY = """
+            CALL {
+                UNWIND $replaced_sources AS title
+                MATCH (:Page {title: title})-[old_link:link]->()
+                DELETE old_link
+            }
+            CALL {
+                UNWIND $links AS link
+                MERGE (p1:Page {title: link.source})
+                MERGE (p2:Page {title: link.target}) ON CREATE SET p2.status = $page_status
+                MERGE (p1)-[:link]->(p2)
+            }
+            CALL {
+                UNWIND $statuses AS row
+                MATCH (p:Page {title: row.title})
+                SET p.status = row.status
+            }
+            """
 
+    _RECORD_PAGE_FAILURE_QUERY = """MATCH (p:Page {title: $page_title})
+                                    SET p.status = $page_status,
+                                        p.attempts = $attempts,
+                                        p.last_error = $last_error,
+                                        p.next_retry_at = $next_retry_at"""
+
+    _COLLAPSE_REDIRECT_QUERY = """
+            MATCH (alias:Page {title: $alias_title})
+            MERGE (canonical:Page {title: $canonical_title}) ON CREATE SET canonical.status = $page_status
+            WITH alias, canonical
+            CALL {
+                WITH alias, canonical
+                MATCH (source:Page)-[:link]->(alias)
+                WHERE source <> canonical
+                MERGE (source)-[:link]->(canonical)
+            }
+            DETACH DELETE alias
             """
 
     _GET_PAGE_WITHOUT_LINKS_QUERY = """MATCH (page:Page) WHERE not ((page)-[:link]->(:Page))
                                        AND page.status IN $target_statuses
+                                       AND coalesce(page.next_retry_at, 0) <= $now
                                        RETURN page LIMIT $limit"""
 
+    async def create_constraints(self) -> None:
+        """
+        Создаёт ограничение уникальности `title` для метки раздела.
+
+        Без него параллельные MERGE одной и той же страницы из разных пачек могут создать дубликаты.
+        Если ограничение создать не удалось (например, дубликаты уже есть), запись сериализуется.
+        """
+        try:
+            await self._connection.query(
+                self._labeled(self._CREATE_TITLE_CONSTRAINT_QUERY % self._label),
+                name="create_title_constraint",
+            )
+        except Neo4jError:
+            self._logger.exception(
+                "Failed to create unique constraint on :%s(title). Writes are serialized.", self._label,
+            )
+            self._write_semaphore = asyncio.Semaphore(1)
+            return
+
+        self._logger.debug("Unique constraint on :%s(title) is in place.", self._label)
+
     async def create_one_page(self, page: Page) -> None:
-        async with self._write_lock:
+        async with self._write_semaphore:
             await self._connection.query(
-                self._CREATE_ONE_PAGE_QUERY,
+                self._labeled(self._CREATE_ONE_PAGE_QUERY),
                 parameters={"page_title": page.title, "page_status": PageStatus.open},
+                name="create_one_page",
             )
         self._logger.debug("Page '%s' was been saved.", page)
 
     async def update_page_status(self, page: Page, status: PageStatus) -> None:
-        async with self._write_lock:
+        async with self._write_semaphore:
             await self._connection.query(
-                self._UPDATE_PAGES_STATUS_QUERY,
+                self._labeled(self._UPDATE_PAGES_STATUS_QUERY),
                 parameters={"page_titles": [page.title], "page_status": status},
+                name="update_page_status",
             )
         self._logger.debug("Page '%s' was changed status to '%s'.", page, status)
 
+    async def record_page_failure(
+            self,
+            page: Page,
+            status: PageStatus,
+            last_error: str,
+            next_retry_at: float | None,
+    ) -> None:
+        """
+        Сохраняет неудачную попытку обработки страницы.
+
+        :param page: Страница. `page.attempts` должен уже учитывать текущую попытку.
+        :param status: `PageStatus.failed` для повторной попытки или `PageStatus.dead`.
+        :param last_error: Описание ошибки.
+        :param next_retry_at: Время (unix time), раньше которого страница не будет выдана воркерам.
+        """
+        async with self._write_semaphore:
+            await self._connection.query(
+                self._labeled(self._RECORD_PAGE_FAILURE_QUERY),
+                parameters={
+                    "page_title": page.title,
+                    "page_status": status,
+                    "attempts": page.attempts,
+                    "last_error": last_error,
+                    "next_retry_at": next_retry_at,
+                },
+                name="record_page_failure",
+            )
+        self._logger.debug("Page '%s' failed (attempt %d): %s", page, page.attempts, last_error)
+
+    async def collapse_redirect(self, alias: Page, canonical: Page) -> None:
+        """
+        Переносит входящие связи страницы-редиректа на каноническую страницу и удаляет редирект.
+
+        :param alias: Страница-редирект.
+        :param canonical: Страница, на которую ведёт редирект. Создаётся, если её ещё нет.
+        """
+        async with self._write_semaphore:
+            await self._connection.query(
+                self._labeled(self._COLLAPSE_REDIRECT_QUERY),
+                parameters={
+                    "alias_title": alias.title,
+                    "canonical_title": canonical.title,
+                    "page_status": PageStatus.open,
+                },
+                name="collapse_redirect",
+            )
+        self._logger.debug("Redirect '%s' was collapsed into '%s'.", alias, canonical)
+
     async def create_two_pages_and_link(self, pages: LinkedPages) -> None:
-        async with self._write_lock:
+        async with self._write_semaphore:
             await self._connection.query(
-                self._CREATE_TWO_PAGES_AND_LINK_QUERY,
+                self._labeled(self._CREATE_TWO_PAGES_AND_LINK_QUERY),
                 parameters={
                     "page_title_1": pages.main_page.title,
                     "page_title_2": pages.secondary_page.title,
                     "page_status_2": PageStatus.open,
                 },
+                name="create_two_pages_and_link",
             )
         self._logger.debug("Pages '%s' and Link between them were saved.", pages)
 
     async def create_pages_and_links(self, *linked_pages: LinkedPages, batch_size: int = 100) -> None:
         for pages in batched(linked_pages, n=batch_size):
-            params: dict[str, str] = {}
-            queries: list[str] = []
+            links = [(page.main_page.title, page.secondary_page.title) for page in pages]
+            await self.save_links_and_statuses(links, [])
+            self._logger.debug("Pages '%s' and Link between them were saved.", pages)
 
-            for i, page in enumerate(pages, start=1):
-                queries.append(
-                    self._CREATE_MANY_PAGES_AND_LINKS_QUERY % ((i, ) * 9),
-                )
+    async def save_links_and_statuses(
+            self,
+            links: Sequence[tuple[str, str]],
+            statuses: Sequence[tuple[str, PageStatus]],
+            replaced_sources: Sequence[str] = (),
+    ) -> None:
+        """
+        Сохраняет связи и статусы страниц одной транзакцией через UNWIND.
 
-                params[f"page_title_{i}1"] = page.main_page.title
-                params[f"page_title_{i}2"] = page.secondary_page.title
-                params[f"page_status_{i}2"] = PageStatus.open
+        :param links: Пары (заголовок исходной страницы, заголовок целевой страницы).
+        :param statuses: Пары (заголовок страницы, новый статус). Применяются после создания связей.
+        :param replaced_sources: Страницы, прежние исходящие связи которых удаляются перед созданием `links`.
+        """
+        params = {
+            "replaced_sources": list(replaced_sources),
+            "links": [{"source": source, "target": target} for source, target in links],
+            "statuses": [{"title": title, "status": status} for title, status in statuses],
+            "page_status": PageStatus.open,
+        }
 
-            async with self._write_lock:
-                await self._connection.query("\n".join(queries), parameters=params)  # type: ignore
+        async with self._write_semaphore:
+            await self._connection.query(
+                self._labeled(self._SAVE_LINKS_AND_STATUSES_QUERY),
+                parameters=params,  # type: ignore
+                name="save_links_and_statuses",
+            )
 
-            self._logger.debug("Pages '%s' and Link between them were saved.", pages)
+        self._logger.debug("Saved %d links and %d statuses.", len(links), len(statuses))
 
     async def get_pages_without_links(self, limit: int = 10) -> list[Page]:
         params = {
             "limit": limit,
             "target_statuses": [PageStatus.open, PageStatus.failed],
-            "page_status": PageStatus.in_progress,
+            "now": time.time(),
         }
 
         async with self._read_lock:
-            pages = await self._connection.query(self._GET_PAGE_WITHOUT_LINKS_QUERY, parameters=params)  # type: ignore
+            pages = await self._connection.query(
+                self._labeled(self._GET_PAGE_WITHOUT_LINKS_QUERY),
+                parameters=params,  # type: ignore
+                name="get_pages_without_links",
+            )
             page_models: list[Page] = [Page.model_validate(page["page"]) for page in pages]
 
             await self._connection.query(
-                self._UPDATE_PAGES_STATUS_QUERY,
+                self._labeled(self._UPDATE_PAGES_STATUS_QUERY),
                 parameters={"page_titles": [page.title for page in page_models], "page_status": PageStatus.in_progress},
+                name="claim_pages",
             )
 
         self._logger.debug("Pages without links were received. %s", page_models)
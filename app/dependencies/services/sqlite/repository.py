@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import time
+from functools import partial
+from itertools import batched
+
+from typing_extensions import TYPE_CHECKING
+
+from app.models.page import LinkedPages, Page, PageStatus
+
+if TYPE_CHECKING:
+    import sqlite3
+    from collections.abc import Sequence
+    from logging import Logger
+
+    from app.dependencies.services.sqlite.sqlite_connection import SQLiteConnection
+
+
+class SQLiteRepositoryContainer:
+    _page_repository: SQLitePageRepository | None = None
+
+    def __init__(self, connection: SQLiteConnection, logger: Logger) -> None:
+        self._connection = connection
+        self._logger = logger
+
+    @property
+    def page_repository(self) -> SQLitePageRepository:
+        if not self._page_repository:
+            self._page_repository = SQLitePageRepository(connection=self._connection, logger=self._logger)
+        return self._page_repository
+
+
+class SQLitePageRepository:
+    """Реализация `PageRepository` поверх SQLite с той же семантикой запросов."""
+
+    _CREATE_PAGE_QUERY = """INSERT INTO pages (title, status) VALUES (?, ?) ON CONFLICT (title) DO NOTHING"""
+
+    _UPDATE_PAGE_STATUS_QUERY = """UPDATE pages SET status = ? WHERE title = ?"""
+
+    _CREATE_LINK_QUERY = """INSERT INTO links (src, dst) VALUES (?, ?) ON CONFLICT (src, dst) DO NOTHING"""
+
+    _RECORD_PAGE_FAILURE_QUERY = """UPDATE pages SET status = ?, attempts = ?, last_error = ?, next_retry_at = ?
+                                    WHERE title = ?"""
+
+    _PAGE_EXISTS_QUERY = """SELECT 1 FROM pages WHERE title = ?"""
+
+    _MOVE_INCOMING_LINKS_QUERY = """INSERT INTO links (src, dst)
+                                    SELECT src, ? FROM links WHERE dst = ? AND src <> ?
+                                    ON CONFLICT (src, dst) DO NOTHING"""
+
+    _DELETE_PAGE_LINKS_QUERY = """DELETE FROM links WHERE src = ? OR dst = ?"""
+
+    _DELETE_OUTGOING_LINKS_QUERY = """DELETE FROM links WHERE src = ?"""
+
+    _DELETE_PAGE_QUERY = """DELETE FROM pages WHERE title = ?"""
+
+    _CLAIM_PAGES_WITHOUT_LINKS_QUERY = """
+            UPDATE pages SET status = ?
+            WHERE id IN (
+                SELECT id FROM pages
+                WHERE status IN (?, ?)
+                  AND coalesce(next_retry_at, 0) <= ?
+                  AND NOT EXISTS (SELECT 1 FROM links WHERE links.src = pages.title)
+                LIMIT ?
+            )
+            RETURNING title, attempts
+            """
+
+    def __init__(self, connection: SQLiteConnection, logger: Logger) -> None:
+        self._connection = connection
+        self._logger = logger
+
+    async def create_constraints(self) -> None:
+        """Уникальность `title` задаётся схемой таблицы `pages`, дополнительных ограничений не нужно."""
+
+    async def create_one_page(self, page: Page) -> None:
+        await self._connection.transaction(
+            partial(self._execute, self._CREATE_PAGE_QUERY, (page.title, PageStatus.open)),
+        )
+        self._logger.debug("Page '%s' was been saved.", page)
+
+    async def update_page_status(self, page: Page, status: PageStatus) -> None:
+        await self._connection.transaction(
+            partial(self._execute, self._UPDATE_PAGE_STATUS_QUERY, (status, page.title)),
+        )
+        self._logger.debug("Page '%s' was changed status to '%s'.", page, status)
+
+    async def record_page_failure(
+            self,
+            page: Page,
+            status: PageStatus,
+            last_error: str,
+            next_retry_at: float | None,
+    ) -> None:
+        """
+        Сохраняет неудачную попытку обработки страницы.
+
+        :param page: Страница. `page.attempts` должен уже учитывать текущую попытку.
+        :param status: `PageStatus.failed` для повторной попытки или `PageStatus.dead`.
+        :param last_error: Описание ошибки.
+        :param next_retry_at: Время (unix time), раньше которого страница не будет выдана воркерам.
+        """
+        await self._connection.transaction(
+            partial(
+                self._execute,
+                self._RECORD_PAGE_FAILURE_QUERY,
+                (status, page.attempts, last_error, next_retry_at, page.title),
+            ),
+        )
+        self._logger.debug("Page '%s' failed (attempt %d): %s", page, page.attempts, last_error)
+
+    async def collapse_redirect(self, alias: Page, canonical: Page) -> None:
+        """
+        Переносит входящие связи страницы-редиректа на каноническую страницу и удаляет редирект.
+
+        :param alias: Страница-редирект.
+        :param canonical: Страница, на которую ведёт редирект. Создаётся, если её ещё нет.
+        """
+        await self._connection.transaction(partial(self._collapse_redirect, alias.title, canonical.title))
+        self._logger.debug("Redirect '%s' was collapsed into '%s'.", alias, canonical)
+
+    async def create_two_pages_and_link(self, pages: LinkedPages) -> None:
+        await self.create_pages_and_links(pages)
+
+    async def create_pages_and_links(self, *linked_pages: LinkedPages, batch_size: int = 100) -> None:
+        for pages in batched(linked_pages, n=batch_size):
+            links = [(page.main_page.title, page.secondary_page.title) for page in pages]
+            await self._connection.transaction(partial(self._save_links_and_statuses, links, [], ()))
+            self._logger.debug("Pages '%s' and Link between them were saved.", pages)
+
+    async def save_links_and_statuses(
+            self,
+            links: Sequence[tuple[str, str]],
+            statuses: Sequence[tuple[str, PageStatus]],
+            replaced_sources: Sequence[str] = (),
+    ) -> None:
+        """
+        Сохраняет связи и статусы страниц одной транзакцией через `executemany`.
+
+        :param links: Пары (заголовок исходной страницы, заголовок целевой страницы).
+        :param statuses: Пары (заголовок страницы, новый статус). Применяются после создания связей.
+        :param replaced_sources: Страницы, прежние исходящие связи которых удаляются перед созданием `links`.
+        """
+        await self._connection.transaction(
+            partial(self._save_links_and_statuses, links, statuses, replaced_sources),
+        )
+        self._logger.debug("Saved %d links and %d statuses.", len(links), len(statuses))
+
+    async def get_pages_without_links(self, limit: int = 10) -> list[Page]:
+        params = (PageStatus.in_progress, PageStatus.open, PageStatus.failed, time.time(), limit)
+
+        rows = await self._connection.transaction(
+            partial(self._fetch_all, self._CLAIM_PAGES_WITHOUT_LINKS_QUERY, params),
+        )
+        page_models = [Page(title=title, attempts=attempts) for title, attempts in rows]
+
+        self._logger.debug("Pages without links were received. %s", page_models)
+        return page_models
+
+    @staticmethod
+    def _execute(query: str, params: tuple, connection: sqlite3.Connection) -> None:
+        connection.execute(query, params)
+
+    @staticmethod
+    def _fetch_all(query: str, params: tuple, connection: sqlite3.Connection) -> list[tuple]:
+        return connection.execute(query, params).fetchall()
+
+    def _save_links_and_statuses(
+            self,
+            links: Sequence[tuple[str, str]],
+            statuses: Sequence[tuple[str, PageStatus]],
+            replaced_sources: Sequence[str],
+            connection: sqlite3.Connection,
+    ) -> None:
+        sources = {(source, None) for source, _ in links}
+        targets = {(target, PageStatus.open) for _, target in links}
+
+        connection.executemany(self._DELETE_OUTGOING_LINKS_QUERY, [(title,) for title in replaced_sources])
+        connection.executemany(self._CREATE_PAGE_QUERY, sources)
+        connection.executemany(self._CREATE_PAGE_QUERY, targets)
+        connection.executemany(self._CREATE_LINK_QUERY, links)
+        connection.executemany(self._UPDATE_PAGE_STATUS_QUERY, [(status, title) for title, status in statuses])
+
+    def _collapse_redirect(self, alias_title: str, canonical_title: str, connection: sqlite3.Connection) -> None:
+        if connection.execute(self._PAGE_EXISTS_QUERY, (alias_title,)).fetchone() is None:
+            return
+
+        connection.execute(self._CREATE_PAGE_QUERY, (canonical_title, PageStatus.open))
+        connection.execute(self._MOVE_INCOMING_LINKS_QUERY, (canonical_title, alias_title, canonical_title))
+        connection.execute(self._DELETE_PAGE_LINKS_QUERY, (alias_title, alias_title))
+        connection.execute(self._DELETE_PAGE_QUERY, (alias_title,))
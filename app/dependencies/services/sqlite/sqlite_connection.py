@@ -0,0 +1,74 @@
+import asyncio
+import sqlite3
+from dataclasses import dataclass
+from logging import Logger
+
+from typing_extensions import Callable, TypeVar
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class SQLiteConfig:
+    path: str
+
+
+class SQLiteConnection:
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pages (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL UNIQUE,
+            status TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            next_retry_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS pages_status_idx ON pages (status, next_retry_at);
+
+        CREATE TABLE IF NOT EXISTS links (
+            src TEXT NOT NULL,
+            dst TEXT NOT NULL,
+            PRIMARY KEY (src, dst)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS links_dst_idx ON links (dst);
+    """
+
+    _connection: sqlite3.Connection | None = None
+
+    def __init__(self, sqlite_config: SQLiteConfig, logger: Logger) -> None:
+        self.sqlite_config = sqlite_config
+        self.logger = logger
+        self._lock = asyncio.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if not self._connection:
+            self._connection = sqlite3.connect(self.sqlite_config.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(self._SCHEMA)
+        return self._connection
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            async with self._lock:
+                await asyncio.to_thread(self._connection.close)
+            self._connection = None
+
+    async def transaction(self, function: Callable[[sqlite3.Connection], _T]) -> _T:
+        """
+        Выполняет функцию в отдельном потоке внутри одной транзакции.
+
+        :param function: Функция, принимающая соединение. Все её запросы фиксируются вместе.
+        :return: Результат функции.
+        """
+        async with self._lock:
+            try:
+                return await asyncio.to_thread(self._run_in_transaction, function)
+            except Exception:
+                self.logger.exception("SQLite transaction '%s' failed.", getattr(function, "__name__", function))
+                raise
+
+    def _run_in_transaction(self, function: Callable[[sqlite3.Connection], _T]) -> _T:
+        with self.connection:
+            return function(self.connection)
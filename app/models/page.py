@@ -1,3 +1,5 @@
+from collections.abc import Iterator
+from dataclasses import dataclass
 from enum import StrEnum, auto
 
 from pydantic import BaseModel
@@ -8,12 +10,29 @@ class PageStatus(StrEnum):
     in_progress = auto()
     failed = auto()
     success = auto()
+    dead = auto()
 
 
 class Page(BaseModel):
     title: str
+    attempts: int = 0
 
 
 class LinkedPages(BaseModel):
     main_page: Page
     secondary_page: Page
+
+
+@dataclass(slots=True, frozen=True)
+class PageLinks:
+    """
+    Все исходящие ссылки одной страницы. Внутреннее представление без валидации для горячего пути
+    между `LinkPreprocessor` и репозиторием; `LinkedPages` остаётся для внешних вызовов.
+    """
+
+    source: str
+    targets: list[str]
+
+    def rows(self) -> Iterator[tuple[str, str]]:
+        for target in self.targets:
+            yield self.source, target
@@ -0,0 +1,50 @@
+class AdaptiveBatchSize:
+    """
+    Размер пачки записи, подстраивающийся под задержку коммита (AIMD).
+
+    Пока полные пачки коммитятся быстрее `target_latency`, размер растёт на `increase_step`.
+    При ошибке транзакции или задержке больше `target_latency * _SPIKE_FACTOR` размер уменьшается вдвое.
+    """
+
+    _SPIKE_FACTOR = 2.0
+
+    def __init__(
+            self,
+            initial_size: int = 500,
+            min_size: int = 50,
+            max_size: int = 10_000,
+            target_latency: float = 0.5,
+            increase_step: int = 100,
+    ) -> None:
+        self._min_size = min_size
+        self._max_size = max_size
+        self._target_latency = target_latency
+        self._increase_step = increase_step
+
+        self.size = min(max(initial_size, min_size), max_size)
+        self.last_latency = 0.0
+
+    @property
+    def at_minimum(self) -> bool:
+        return self.size <= self._min_size
+
+    def record_success(self, latency: float, rows: int) -> None:
+        """
+        Учитывает успешный коммит.
+
+        :param latency: Время транзакции в секундах.
+        :param rows: Количество строк в транзакции. Рост только по полным пачкам.
+        """
+        self.last_latency = latency
+
+        if latency > self._target_latency * self._SPIKE_FACTOR:
+            self._shrink()
+        elif latency < self._target_latency and rows >= self.size:
+            self.size = min(self.size + self._increase_step, self._max_size)
+
+    def record_failure(self) -> None:
+        """Учитывает ошибку транзакции (таймаут, нехватка памяти и т.п.)."""
+        self._shrink()
+
+    def _shrink(self) -> None:
+        self.size = max(self.size // 2, self._min_size)
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import struct
+import time
+import zlib
+from pathlib import Path
+
+from typing_extensions import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from typing import BinaryIO
+
+type CapturedPage = tuple[str, float, str]
+
+_RECORD_HEADER = struct.Struct("<dII")
+_INDEX_ENTRY = struct.Struct("<QdI")
+_SEGMENT_NAME = re.compile(r"segment-(\d+)\.log")
+_REDIRECTS_NAME = "redirects.tsv"
+_REDIRECTS_SEPARATOR = "\t"
+
+
+class CaptureLog:
+    """
+    Журнал сырых страниц: append-only сегменты с индексом смещений.
+
+    Сегмент `segment-NNNNNN.log` состоит из записей: заголовок `<dII>` (время загрузки,
+    длина заголовка страницы, длина тела), заголовок страницы в UTF-8 и тело, сжатое zlib.
+    Индекс `segment-NNNNNN.idx` содержит для каждой записи `<QdI>` (смещение, время, длина заголовка)
+    и сам заголовок. При превышении `segment_size` байт начинается новый сегмент.
+    Каждый запуск пишет в новый сегмент, старые не изменяются.
+
+    Разрешённые редиректы дописываются в `redirects.tsv` строками `<редирект>\t<канонический заголовок>`,
+    чтобы воспроизведение могло привести цели ссылок к каноническим заголовкам без запросов к API.
+    """
+
+    def __init__(self, directory: str | Path, segment_size: int = 64 * 1024 * 1024) -> None:
+        self._directory = Path(directory)
+        self._segment_size = segment_size
+        self._lock = asyncio.Lock()
+
+        self._segment_number = 0
+        self._segment: BinaryIO | None = None
+        self._index: BinaryIO | None = None
+
+    async def append(self, title: str, body: str) -> None:
+        """
+        Дописывает страницу в текущий сегмент. Сжатие и запись выполняются в отдельном потоке.
+
+        :param title: Заголовок страницы.
+        :param body: HTML страницы.
+        """
+        fetched_at = time.time()
+
+        async with self._lock:
+            await asyncio.to_thread(self._append, title, body, fetched_at)
+
+    async def append_redirects(self, redirects: dict[str, str]) -> None:
+        """
+        Дописывает разрешённые редиректы.
+
+        :param redirects: Отображение заголовка-редиректа в канонический заголовок.
+        """
+        if not redirects:
+            return
+
+        async with self._lock:
+            await asyncio.to_thread(self._append_redirects, redirects)
+
+    async def close(self) -> None:
+        async with self._lock:
+            self._close_segment()
+
+    def _append(self, title: str, body: str, fetched_at: float) -> None:
+        encoded_title = title.encode()
+        compressed_body = zlib.compress(body.encode())
+
+        segment, index = self._current_segment()
+        offset = segment.tell()
+
+        segment.write(_RECORD_HEADER.pack(fetched_at, len(encoded_title), len(compressed_body)))
+        segment.write(encoded_title)
+        segment.write(compressed_body)
+        segment.flush()
+
+        index.write(_INDEX_ENTRY.pack(offset, fetched_at, len(encoded_title)))
+        index.write(encoded_title)
+        index.flush()
+
+    def _append_redirects(self, redirects: dict[str, str]) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+        with (self._directory / _REDIRECTS_NAME).open("a", encoding="utf-8") as file:
+            file.writelines(f"{alias}{_REDIRECTS_SEPARATOR}{canonical}\n" for alias, canonical in redirects.items())
+
+    def _current_segment(self) -> tuple[BinaryIO, BinaryIO]:
+        if self._segment is not None and self._segment.tell() >= self._segment_size:
+            self._close_segment()
+
+        if self._segment is None or self._index is None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+
+            if not self._segment_number:
+                self._segment_number = max((number for number, _ in list_segments(self._directory)), default=0)
+            self._segment_number += 1
+
+            path = self._directory / f"segment-{self._segment_number:06d}.log"
+            self._segment = path.open("ab")
+            self._index = path.with_suffix(".idx").open("ab")
+
+        return self._segment, self._index
+
+    def _close_segment(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        if self._index is not None:
+            self._index.close()
+        self._segment = self._index = None
+
+
+def list_segments(directory: str | Path) -> list[tuple[int, Path]]:
+    """Сегменты журнала в директории, упорядоченные по номеру."""
+    segments = []
+
+    for path in Path(directory).glob("segment-*.log"):
+        match = _SEGMENT_NAME.fullmatch(path.name)
+        if match:
+            segments.append((int(match.group(1)), path))
+
+    return sorted(segments)
+
+
+def load_redirects(directory: str | Path) -> dict[str, str]:
+    """
+    Читает редиректы, записанные при загрузке. Более поздняя запись заменяет более раннюю,
+    недописанная последняя строка (обрыв при записи) пропускается.
+
+    :param directory: Директория журнала раздела.
+    :return: Отображение заголовка-редиректа в канонический заголовок.
+    """
+    path = Path(directory) / _REDIRECTS_NAME
+    if not path.exists():
+        return {}
+
+    with path.open(encoding="utf-8") as file:
+        return dict(
+            line.removesuffix("\n").split(_REDIRECTS_SEPARATOR, 1)
+            for line in file
+            if line.endswith("\n") and _REDIRECTS_SEPARATOR in line
+        )
+
+
+def iter_segment(path: str | Path) -> Iterator[CapturedPage]:
+    """
+    Последовательно читает сегмент. Недописанная последняя запись (обрыв при записи) пропускается.
+
+    :param path: Путь к файлу сегмента.
+    :return: Кортежи (заголовок, время загрузки, HTML).
+    """
+    with Path(path).open("rb") as segment:
+        while (record := _read_record(segment)) is not None:
+            yield record
+
+
+def read_records(path: str | Path, offsets: Iterable[int]) -> Iterator[CapturedPage]:
+    """
+    Читает записи сегмента по смещениям из индекса. Недописанные записи пропускаются.
+
+    :param path: Путь к файлу сегмента.
+    :param offsets: Смещения записей в сегменте.
+    :return: Кортежи (заголовок, время загрузки, HTML).
+    """
+    with Path(path).open("rb") as segment:
+        for offset in offsets:
+            segment.seek(offset)
+            record = _read_record(segment)
+
+            if record is not None:
+                yield record
+
+
+def iter_index(path: str | Path) -> Iterator[tuple[str, float, int]]:
+    """
+    Читает индекс сегмента без чтения самих страниц.
+
+    :param path: Путь к файлу индекса.
+    :return: Кортежи (заголовок, время загрузки, смещение записи в сегменте).
+    """
+    with Path(path).open("rb") as index:
+        while entry := index.read(_INDEX_ENTRY.size):
+            if len(entry) < _INDEX_ENTRY.size:
+                return
+
+            offset, fetched_at, title_size = _INDEX_ENTRY.unpack(entry)
+            title = index.read(title_size)
+
+            if len(title) < title_size:
+                return
+
+            yield title.decode(), fetched_at, offset
+
+
+def _read_record(segment: BinaryIO) -> CapturedPage | None:
+    r"""
+    Читает запись с текущей позиции сегмента.
+
+    :return: Запись \ Ничего, если сегмент закончился или запись недописана.
+    """
+    header = segment.read(_RECORD_HEADER.size)
+    if len(header) < _RECORD_HEADER.size:
+        return None
+
+    fetched_at, title_size, body_size = _RECORD_HEADER.unpack(header)
+    payload = segment.read(title_size + body_size)
+
+    if len(payload) < title_size + body_size:
+        return None
+    return payload[:title_size].decode(), fetched_at, zlib.decompress(payload[title_size:]).decode()
@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты запросов (token bucket).
+
+    В среднем пропускает не более `rate` вызовов в секунду, допуская всплески до `burst` вызовов.
+    Ожидающие обслуживаются по очереди.
+    """
+
+    def __init__(self, rate: float, burst: int | None = None) -> None:
+        self._rate = rate
+        self._burst = burst or max(int(rate), 1)
+        self._tokens = float(self._burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._refill()
+
+            self._tokens -= 1
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from itertools import batched
+
+from typing_extensions import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    from logging import Logger
+
+    from app.services.capture import CaptureLog
+
+
+class RedirectsFetcher(Protocol):
+    async def fetch_redirects(self, titles: list[str]) -> dict[str, str] | None:
+        """
+        Разрешает редиректы для списка заголовков.
+
+        :param titles: Заголовки страниц.
+        :return: Отображение исходного заголовка в заголовок конечной статьи \\ Ничего, если запрос не удался.
+        """
+
+
+class RedirectResolver:
+    """
+    Приводит заголовки страниц к каноническим с учётом редиректов Википедии.
+
+    Канонический заголовок записывается так же, как в ссылках `/wiki/...` (пробелы заменены на `_`).
+    Результаты хранятся в LRU-кэше, поэтому к API обращаемся только за новыми заголовками.
+    Если включён журнал сырых страниц, найденные редиректы записываются и в него.
+    """
+
+    _API_BATCH_SIZE = 50
+
+    def __init__(
+            self,
+            fetcher: RedirectsFetcher,
+            logger: Logger,
+            cache_size: int = 1_000_000,
+            capture_log: CaptureLog | None = None,
+    ) -> None:
+        self._fetcher = fetcher
+        self._logger = logger
+        self._cache_size = cache_size
+        self._capture_log = capture_log
+        self._cache: OrderedDict[str, str] = OrderedDict()
+
+    async def resolve(self, title: str) -> str:
+        """
+        Возвращает канонический заголовок страницы.
+
+        :param title: Заголовок страницы.
+        """
+        canonical_titles = await self.canonical_titles([title])
+        return canonical_titles[title]
+
+    async def resolve_many(self, titles: list[str]) -> list[str]:
+        """
+        Возвращает канонические заголовки без дубликатов, сохраняя порядок первого появления.
+
+        :param titles: Заголовки страниц.
+        """
+        canonical_titles = await self.canonical_titles(titles)
+        return list(dict.fromkeys(canonical_titles[title] for title in titles))
+
+    async def canonical_titles(self, titles: list[str]) -> dict[str, str]:
+        """
+        Разрешает заголовки пачками по `_API_BATCH_SIZE` за запрос к API.
+
+        Если API недоступен, заголовок остаётся без изменений и не кэшируется.
+
+        :param titles: Заголовки страниц.
+        :return: Отображение каждого заголовка в канонический.
+        """
+        unknown = list(dict.fromkeys(title for title in titles if title not in self._cache))
+
+        resolved: dict[str, str] = {}
+        for batch in batched(unknown, n=self._API_BATCH_SIZE):
+            batch_resolved = await self._fetcher.fetch_redirects(list(batch))
+            if batch_resolved is not None:
+                resolved.update(await self._remember_batch(batch_resolved))
+
+        return {title: self._lookup(title) or resolved.get(title, title) for title in titles}
+
+    async def _remember_batch(self, batch_resolved: dict[str, str]) -> dict[str, str]:
+        """
+        Кэширует ответ API.
+
+        :param batch_resolved: Отображение заголовка в заголовок конечной статьи из ответа API.
+        :return: Отображение заголовка в канонический заголовок в форме ссылки.
+        """
+        canonical_titles = {title: self._to_link_form(target) for title, target in batch_resolved.items()}
+
+        for title, canonical in canonical_titles.items():
+            self._remember(title, canonical)
+            self._remember(canonical, canonical)
+
+        if self._capture_log is not None:
+            await self._capture_log.append_redirects({
+                title: canonical for title, canonical in canonical_titles.items() if title != canonical
+            })
+        return canonical_titles
+
+    def _lookup(self, title: str) -> str | None:
+        canonical = self._cache.get(title)
+        if canonical is not None:
+            self._cache.move_to_end(title)
+        return canonical
+
+    def _remember(self, title: str, canonical: str) -> None:
+        self._cache[title] = canonical
+        self._cache.move_to_end(title)
+
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _to_link_form(title: str) -> str:
+        return title.replace(" ", "_")
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from typing_extensions import TYPE_CHECKING
+
+from app.models.page import Page, PageLinks, PageStatus
+from app.services.capture import iter_index, list_segments, load_redirects, read_records
+from app.services.links import LinkPreprocessor
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from logging import Logger
+
+    from app.dependencies.editions import WikiEdition
+
+
+def latest_records(directory: Path) -> dict[Path, list[int]]:
+    """
+    Выбирает по индексам сегментов последнюю загрузку каждой страницы.
+    При равном времени загрузки побеждает запись из более позднего сегмента.
+
+    :param directory: Директория журнала раздела.
+    :return: Сегменты и отсортированные смещения выбранных в них записей.
+    """
+    latest: dict[str, tuple[float, Path, int]] = {}
+
+    for _, path in list_segments(directory):
+        for title, fetched_at, offset in iter_index(path.with_suffix(".idx")):
+            if title not in latest or fetched_at >= latest[title][0]:
+                latest[title] = (fetched_at, path, offset)
+
+    return _group_offsets(latest.values())
+
+
+def _group_offsets(records: Iterable[tuple[float, Path, int]]) -> dict[Path, list[int]]:
+    offsets: dict[Path, list[int]] = {}
+
+    for _, path, offset in records:
+        offsets.setdefault(path, []).append(offset)
+
+    return {path: sorted(segment_offsets) for path, segment_offsets in offsets.items()}
+
+
+def parse_records(path: Path, offsets: list[int]) -> list[tuple[str, list[str]]]:
+    """
+    Разбирает выбранные страницы сегмента. Выполняется в отдельном процессе.
+
+    :param path: Путь к файлу сегмента.
+    :param offsets: Смещения записей в сегменте.
+    :return: Пары (заголовок страницы, ссылки).
+    """
+    return [(title, LinkPreprocessor(page=body).preprocess()) for title, _, body in read_records(path, offsets)]
+
+
+class Replayer:
+    """
+    Перестраивает граф из журнала сырых страниц без HTTP-запросов.
+
+    Из каждой страницы берётся только последняя загрузка (по индексам сегментов), поэтому устаревшие
+    копии страницы не воспроизводятся. Сегменты разбираются параллельно в пуле процессов,
+    результаты пишутся через буферы записи разделов.
+
+    Исходящие связи воспроизведённой страницы заменяются целиком в той же транзакции, поэтому связи,
+    которые новые правила `LinkPreprocessor` больше не находят, удаляются. Страницы, на которые
+    вели только такие связи, остаются в графе без входящих связей.
+    Цели ссылок приводятся к каноническим заголовкам по редиректам, записанным при загрузке
+    (`redirects.tsv`), без запросов к API.
+    """
+
+    def __init__(self, editions: list[WikiEdition], logger: Logger, max_workers: int | None = None) -> None:
+        self._editions = editions
+        self._logger = logger
+        self._max_workers = max_workers
+
+    async def replay(self, capture_dir: str | Path) -> None:
+        """
+        Воспроизводит журналы `<capture_dir>/<язык>/segment-*.log` всех настроенных разделов.
+
+        :param capture_dir: Корневая директория журналов.
+        """
+        with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+            for edition in self._editions:
+                await self._replay_edition(edition, Path(capture_dir) / edition.language, executor)
+
+    async def _replay_edition(self, edition: WikiEdition, directory: Path, executor: ProcessPoolExecutor) -> None:
+        flush_task = asyncio.create_task(edition.write_buffer.run())
+
+        try:
+            records = await asyncio.to_thread(latest_records, directory)
+            redirects = await asyncio.to_thread(load_redirects, directory)
+            parsing = [
+                asyncio.get_running_loop().run_in_executor(executor, parse_records, path, offsets)
+                for path, offsets in records.items()
+            ]
+
+            for parsed in asyncio.as_completed(parsing):
+                pages = await parsed
+                await asyncio.gather(*(self._write_page(edition, title, links, redirects) for title, links in pages))
+                self._logger.info("[%s] Replayed %d pages.", edition.language, len(pages))
+        finally:
+            flush_task.cancel()
+            await asyncio.gather(flush_task, return_exceptions=True)
+
+    @staticmethod
+    async def _write_page(edition: WikiEdition, title: str, links: list[str], redirects: dict[str, str]) -> None:
+        """Заменяет исходящие связи страницы связями с каноническими заголовками целей."""
+        targets = list(dict.fromkeys(redirects.get(link, link) for link in links))
+
+        await edition.write_buffer.add_links(
+            page=Page(title=title),
+            links=PageLinks(source=title, targets=targets),
+            status=PageStatus.success,
+            replace=True,
+        )
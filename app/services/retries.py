@@ -1,9 +1,14 @@
 import asyncio
+import random
 import time
-from contextlib import suppress
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from enum import StrEnum, auto
 from functools import wraps
+from logging import Logger
 
-from typing_extensions import Awaitable, Callable, ParamSpec, TypeAlias, TypeVar
+from typing_extensions import Awaitable, Callable, ParamSpec, Self, TypeAlias, TypeVar
 
 _T = TypeVar("_T")
 _P = ParamSpec("_P")
@@ -15,17 +20,25 @@ def retries(
         num_retries: int,
         timeout: float,
         exception: type[Exception] = Exception,
-) -> Callable[[_Func[_P, _T]], _Func[_P, _T | None]]:
+        max_timeout: float | None = None,
+) -> Callable[[_Func[_P, _T]], _Func[_P, _T]]:
+    """
+    Повторяет вызов при ошибке `exception` с экспоненциальной задержкой и полным джиттером.
 
-    def decorator(function: _Func[_P, _T]) -> _Func[_P, _T | None]:
+    Пока предохранитель зависимости разомкнут, ждёт `CircuitOpenError.retry_after` секунд.
+    Ошибка последней попытки пробрасывается вызывающему.
+    """
+    max_delay = timeout * 2 ** num_retries if max_timeout is None else max_timeout
+
+    def decorator(function: _Func[_P, _T]) -> _Func[_P, _T]:
 
         @wraps(function)
-        def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _T | None:
-            for _ in range(num_retries):
-                with suppress(exception):
+        def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _T:
+            for attempt in range(num_retries - 1):
+                with _RetryAttempt(exception, full_jitter_backoff(attempt, timeout, max_delay)) as retry_attempt:
                     return function(*args, **kwargs)
-                time.sleep(timeout)
-            return None
+                time.sleep(retry_attempt.delay)
+            return function(*args, **kwargs)
 
         return wrapper
 
@@ -36,18 +49,216 @@ def async_retries(
         num_retries: int,
         timeout: float,
         exception: type[Exception] = Exception,
-) -> Callable[[_AsyncFunc[_P, _T]], _AsyncFunc[_P, _T | None]]:
+        max_timeout: float | None = None,
+) -> Callable[[_AsyncFunc[_P, _T]], _AsyncFunc[_P, _T]]:
+    """Асинхронный вариант `retries`."""
+    max_delay = timeout * 2 ** num_retries if max_timeout is None else max_timeout
 
-    def decorator(function: _AsyncFunc[_P, _T]) -> _AsyncFunc[_P, _T | None]:
+    def decorator(function: _AsyncFunc[_P, _T]) -> _AsyncFunc[_P, _T]:
 
         @wraps(function)
-        async def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _T | None:
-            for _ in range(num_retries):
-                with suppress(exception):
+        async def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _T:
+            for attempt in range(num_retries - 1):
+                with _RetryAttempt(exception, full_jitter_backoff(attempt, timeout, max_delay)) as retry_attempt:
                     return await function(*args, **kwargs)
-                await asyncio.sleep(timeout)
-            return None
+                await asyncio.sleep(retry_attempt.delay)
+            return await function(*args, **kwargs)
 
         return wrapper
 
     return decorator
+
+
+class _RetryAttempt:
+    """
+    Как `contextlib.suppress`, но запоминает задержку перед следующей попыткой:
+    `retry_after` разомкнутого предохранителя или переданную задержку для ошибки `exception`.
+    """
+
+    def __init__(self, exception: type[Exception], backoff: float) -> None:
+        self._exception = exception
+        self.delay = backoff
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: object) -> bool:
+        if isinstance(exc, CircuitOpenError):
+            self.delay = exc.retry_after
+            return True
+        return isinstance(exc, self._exception)
+
+
+def full_jitter_backoff(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Экспоненциальная задержка с полным джиттером: случайное значение из [0, min(max_delay, base_delay * 2^attempt)].
+
+    :param attempt: Номер попытки, начиная с 0.
+    :param base_delay: Базовая задержка в секундах.
+    :param max_delay: Максимальная задержка в секундах.
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))  # noqa: S311
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+
+    def next_retry_at(self, attempts: int, now: float | None = None) -> float | None:
+        """
+        Время следующей попытки (unix time) или None, если попытки исчерпаны.
+
+        :param attempts: Количество уже неудачных попыток.
+        :param now: Текущее время. По умолчанию `time.time()`.
+        """
+        if attempts >= self.max_attempts:
+            return None
+
+        now = time.time() if now is None else now
+        return now + full_jitter_backoff(attempts - 1, self.base_delay, self.max_delay)
+
+
+class CircuitState(StrEnum):
+    closed = auto()
+    open = auto()
+    half_open = auto()
+
+
+class CircuitOpenError(Exception):
+    """Зависимость недоступна: вызов отклонён без обращения к ней. Повторить не раньше, чем через `retry_after`."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"Circuit breaker '{name}' is open. Retry after {retry_after:.1f}s.")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для одной зависимости, общий для всех воркеров.
+
+    closed: вызовы проходят, подряд идущие ошибки считаются. После `failure_threshold` ошибок -> open.
+    open: вызовы сразу отклоняются с `CircuitOpenError`. Через `recovery_timeout` секунд -> half_open.
+    half_open: пропускается один пробный вызов. Успех -> closed, ошибка -> open.
+    """
+
+    def __init__(self, name: str, logger: Logger, failure_threshold: int = 5, recovery_timeout: float = 30.0) -> None:
+        self.name = name
+        self._logger = logger
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+
+        self._state = CircuitState.closed
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.transitions: dict[CircuitState, int] = dict.fromkeys(CircuitState, 0)
+
+    @property
+    def state(self) -> CircuitState:
+        return self._state
+
+    @property
+    def retry_after(self) -> float:
+        """Через сколько секунд разомкнутый предохранитель пропустит пробный вызов. 0, если вызовы разрешены."""
+        if self._state != CircuitState.open:
+            return 0.0
+        return max(self._opened_at + self._recovery_timeout - time.monotonic(), 0.0)
+
+    def before_call(self) -> None:
+        """
+        Проверяет, можно ли обращаться к зависимости.
+
+        :raises CircuitOpenError: Если предохранитель разомкнут или пробный вызов уже выполняется.
+        """
+        if self._state == CircuitState.open:
+            retry_after = self._opened_at + self._recovery_timeout - time.monotonic()
+            if retry_after > 0:
+                raise CircuitOpenError(self.name, retry_after)
+            self._set_state(CircuitState.half_open)
+
+        if self._state == CircuitState.half_open:
+            if self._probe_in_flight:
+                raise CircuitOpenError(self.name, self._recovery_timeout)
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probe_in_flight = False
+
+        if self._state != CircuitState.closed:
+            self._set_state(CircuitState.closed)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+
+        if self._state == CircuitState.half_open or self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+            self._set_state(CircuitState.open)
+
+    @asynccontextmanager
+    async def protect(self, is_failure: Callable[[Exception], bool] | None = None) -> AsyncIterator[None]:
+        """
+        Оборачивает вызов зависимости.
+
+        :param is_failure: Считать ли ошибку отказом зависимости. По умолчанию любая ошибка - отказ.
+                           Остальные ошибки (например, 404) означают, что зависимость ответила.
+        :raises CircuitOpenError: Если предохранитель разомкнут.
+        """
+        self.before_call()
+
+        try:
+            yield
+        except Exception as e:
+            self._record_error(e, is_failure)
+            raise
+        except BaseException:
+            self._probe_in_flight = False
+            raise
+
+        self.record_success()
+
+    def metrics(self) -> dict[str, str | int]:
+        return {
+            "name": self.name,
+            "state": self._state,
+            "consecutive_failures": self._failures,
+            **{f"transitions_to_{state}": count for state, count in self.transitions.items()},
+        }
+
+    def _record_error(self, error: Exception, is_failure: Callable[[Exception], bool] | None) -> None:
+        if is_failure is None or is_failure(error):
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def _set_state(self, state: CircuitState) -> None:
+        self._logger.warning("Circuit breaker '%s' changed state: %s -> %s", self.name, self._state, state)
+        self._state = state
+        self.transitions[state] += 1
+
+
+class CircuitBreakers:
+    """Реестр предохранителей по имени зависимости."""
+
+    def __init__(self, logger: Logger, failure_threshold: int = 5, recovery_timeout: float = 30.0) -> None:
+        self._logger = logger
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        if name not in self._breakers:
+            self._breakers[name] = CircuitBreaker(
+                name=name,
+                logger=self._logger,
+                failure_threshold=self._failure_threshold,
+                recovery_timeout=self._recovery_timeout,
+            )
+        return self._breakers[name]
+
+    def metrics(self) -> list[dict[str, str | int]]:
+        return [breaker.metrics() for breaker in self._breakers.values()]
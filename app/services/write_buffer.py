@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import suppress
+from dataclasses import dataclass, field
+
+from typing_extensions import TYPE_CHECKING, Protocol
+
+from app.services.batch_size import AdaptiveBatchSize
+from app.services.retries import CircuitOpenError
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from logging import Logger
+
+    from app.models.page import Page, PageLinks, PageStatus
+
+
+class WriteRepository(Protocol):
+    async def save_links_and_statuses(
+            self,
+            links: Sequence[tuple[str, str]],
+            statuses: Sequence[tuple[str, PageStatus]],
+            replaced_sources: Sequence[str] = (),
+    ) -> None:
+        """
+        Сохраняет связи и статусы страниц одной транзакцией.
+
+        :param links: Пары (заголовок исходной страницы, заголовок целевой страницы).
+        :param statuses: Пары (заголовок страницы, новый статус).
+        :param replaced_sources: Страницы, прежние исходящие связи которых удаляются перед созданием `links`.
+        """
+
+
+@dataclass
+class FlushPolicy:
+    """
+    Когда и как сбрасывать буфер записи.
+
+    :param max_rows: Количество накопленных строк, при котором буфер сбрасывается досрочно.
+    :param flush_interval: Максимальное время в секундах между сбросами.
+    :param max_concurrency: Сколько пачек связей пишется одновременно.
+    """
+
+    max_rows: int = 5000
+    flush_interval: float = 0.5
+    max_concurrency: int = 1
+
+
+@dataclass(slots=True)
+class _PageRows:
+    """Связи и статус одной страницы. Всегда пишутся одной транзакцией."""
+
+    title: str
+    status: PageStatus | None = None
+    links: list[tuple[str, str]] = field(default_factory=list)
+    replace_links: bool = False
+
+    @property
+    def size(self) -> int:
+        return len(self.links) + (self.status is not None)
+
+
+class PageWriteBuffer:
+    """
+    Общий для всех воркеров буфер отложенной записи.
+
+    Накапливает связи и смены статусов, убирает дубликаты и сбрасывает их в базу
+    по достижении `max_rows` строк или раз в `flush_interval` секунд.
+    Страницы пишутся пачками адаптивного размера (`AdaptiveBatchSize`), до `max_concurrency`
+    транзакций одновременно. Связи и статус одной страницы всегда попадают в одну транзакцию:
+    страница, у которой записана только часть связей, больше не выдаётся воркерам
+    (`get_pages_without_links`), и её граф остался бы неполным.
+    Неудавшиеся пачки повторяются меньшими пачками, пока размер не дойдёт до минимального.
+    Вызывающий получает управление только после того, как данные его страницы записаны,
+    или ошибку транзакции, в которую попала его страница.
+    """
+
+    def __init__(
+            self,
+            page_repository: WriteRepository,
+            logger: Logger,
+            policy: FlushPolicy | None = None,
+            batch_size: AdaptiveBatchSize | None = None,
+    ) -> None:
+        policy = policy or FlushPolicy()
+
+        self._page_repository = page_repository
+        self._logger = logger
+        self._max_rows = policy.max_rows
+        self._flush_interval = policy.flush_interval
+        self._max_concurrency = policy.max_concurrency
+        self._batch_size = batch_size or AdaptiveBatchSize()
+        self._retried_rows = 0
+
+        self._links: dict[tuple[str, str], None] = {}
+        self._statuses: dict[str, PageStatus] = {}
+        self._replaced: dict[str, None] = {}
+        self._waiters: list[tuple[str, asyncio.Future[None]]] = []
+
+        self._flush_lock = asyncio.Lock()
+        self._size_reached = asyncio.Event()
+        self._closed = False
+
+    @property
+    def pending_rows(self) -> int:
+        return len(self._links) + len(self._statuses)
+
+    def metrics(self) -> dict[str, int | float]:
+        return {
+            "pending_rows": self.pending_rows,
+            "batch_size": self._batch_size.size,
+            "commit_latency": self._batch_size.last_latency,
+            "retried_rows": self._retried_rows,
+        }
+
+    async def add_links(self, page: Page, links: PageLinks, status: PageStatus, *, replace: bool = False) -> None:
+        """
+        Добавляет связи страницы и её новый статус. Завершается после записи в базу.
+
+        :param page: Исходная страница.
+        :param links: Исходящие ссылки страницы.
+        :param status: Статус, который получит исходная страница.
+        :param replace: Удалить прежние исходящие связи страницы в той же транзакции.
+        :raises Exception: Ошибка транзакции, в которую попали данные.
+        """
+        self._ensure_open()
+
+        for row in links.rows():
+            self._links[row] = None
+        if replace:
+            self._replaced[page.title] = None
+        await self.update_status(page, status)
+
+    async def update_status(self, page: Page, status: PageStatus) -> None:
+        """
+        Добавляет смену статуса страницы. Завершается после записи в базу.
+
+        :param page: Страница.
+        :param status: Новый статус.
+        :raises Exception: Ошибка транзакции, в которую попали данные.
+        """
+        self._ensure_open()
+        self._statuses[page.title] = status
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append((page.title, waiter))
+
+        if self.pending_rows >= self._max_rows:
+            self._size_reached.set()
+
+        await waiter
+
+    async def run(self) -> None:
+        """Фоновый цикл сброса буфера. При остановке сбрасывает оставшиеся данные."""
+        try:
+            while not self._closed:
+                await self._wait_for_flush()
+                await self._safe_flush()
+        finally:
+            await self._safe_flush()
+
+    async def close(self) -> None:
+        """Запрещает новые записи и сбрасывает накопленные данные."""
+        self._closed = True
+        await self._safe_flush()
+
+    async def flush(self) -> None:
+        """
+        Сбрасывает накопленные данные и оповещает ожидающих.
+
+        :raises Exception: Первая ошибка транзакции. Ожидающие страниц из неудавшихся транзакций
+                           получают ошибку своей транзакции, остальные - подтверждение записи.
+        """
+        async with self._flush_lock:
+            self._size_reached.clear()
+
+            if not self._waiters:
+                return
+
+            pages = self._group_by_page(self._links, self._statuses, self._replaced)
+            self._links, self._statuses, self._replaced = {}, {}, {}
+            waiters, self._waiters = self._waiters, []
+
+            errors = await self._write_pages(pages)
+            self._notify(waiters, errors)
+
+        if errors:
+            raise next(iter(errors.values()))
+
+        self._logger.debug(
+            "Write buffer flushed %d pages. Batch size: %d, commit latency: %.3fs.",
+            len(pages), self._batch_size.size, self._batch_size.last_latency,
+        )
+
+    @staticmethod
+    def _group_by_page(
+            links: dict[tuple[str, str], None],
+            statuses: dict[str, PageStatus],
+            replaced: dict[str, None],
+    ) -> list[_PageRows]:
+        """
+        Группирует строки по исходной странице.
+
+        Страницы и их связи упорядочены по заголовку: одинаковый порядок строк во всех пачках
+        уменьшает взаимные блокировки параллельных транзакций.
+        """
+        pages = {
+            title: _PageRows(title=title, status=status, replace_links=title in replaced)
+            for title, status in statuses.items()
+        }
+
+        for source, target in sorted(links):
+            pages.setdefault(source, _PageRows(title=source)).links.append((source, target))
+
+        return [pages[title] for title in sorted(pages)]
+
+    async def _write_pages(self, pages: list[_PageRows]) -> dict[str, Exception]:
+        """
+        Пишет страницы раундами по `max_concurrency` пачек.
+
+        :return: Ошибки по заголовкам страниц, которые записать не удалось.
+        """
+        errors: dict[str, Exception] = {}
+
+        while pages:
+            chunks = self._pack(pages)
+            retry = await self._write_round(chunks[:self._max_concurrency], errors)
+
+            self._retried_rows += sum(page.size for page in retry)
+            pages = retry + [page for chunk in chunks[self._max_concurrency:] for page in chunk]
+
+        return errors
+
+    def _pack(self, pages: list[_PageRows]) -> list[list[_PageRows]]:
+        """Раскладывает страницы по пачкам до `batch_size` строк. Страница больше пачки занимает пачку целиком."""
+        chunks: list[list[_PageRows]] = []
+        rows = 0
+
+        for page in pages:
+            if not chunks or rows + page.size > self._batch_size.size:
+                chunks.append([])
+                rows = 0
+
+            chunks[-1].append(page)
+            rows += page.size
+
+        return chunks
+
+    async def _write_round(self, chunks: list[list[_PageRows]], errors: dict[str, Exception]) -> list[_PageRows]:
+        """
+        Пишет пачки параллельно. Если часть пачек не записалась, размер пачки уменьшается один раз за раунд.
+
+        :param errors: Сюда добавляются окончательные ошибки страниц: ошибка пачки минимального размера
+                       или разомкнутый предохранитель.
+        :return: Страницы неудавшихся пачек, которые нужно записать повторно пачками нового размера.
+        """
+        results = await asyncio.gather(*(self._write(chunk) for chunk in chunks), return_exceptions=True)
+        failed = [(chunk, result) for chunk, result in zip(chunks, results, strict=True) if result is not None]
+
+        retry: list[_PageRows] = []
+        for chunk, error in failed:
+            if not isinstance(error, Exception):
+                raise error
+
+            if self._batch_size.at_minimum or isinstance(error, CircuitOpenError):
+                errors.update(dict.fromkeys((page.title for page in chunk), error))
+            else:
+                retry.extend(chunk)
+
+        if retry:
+            self._batch_size.record_failure()
+            self._logger.warning(
+                "%d of %d write batches failed, retrying with batch size %d: %r",
+                len(failed), len(chunks), self._batch_size.size, failed[0][1],
+            )
+        return retry
+
+    async def _write(self, pages: list[_PageRows]) -> None:
+        links = [row for page in pages for row in page.links]
+        statuses = [(page.title, page.status) for page in pages if page.status is not None]
+        replaced = [page.title for page in pages if page.replace_links]
+
+        started_at = time.perf_counter()
+        await self._page_repository.save_links_and_statuses(links, statuses, replaced)
+        self._batch_size.record_success(time.perf_counter() - started_at, rows=len(links) + len(statuses))
+
+    async def _wait_for_flush(self) -> None:
+        """Ждёт заполнения буфера, но не дольше `flush_interval` секунд."""
+        with suppress(TimeoutError):
+            async with asyncio.timeout(self._flush_interval):
+                await self._size_reached.wait()
+
+    @staticmethod
+    def _notify(waiters: list[tuple[str, asyncio.Future[None]]], errors: dict[str, Exception]) -> None:
+        for title, waiter in waiters:
+            if waiter.done():
+                continue
+
+            error = errors.get(title)
+            if error is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(error)
+
+    def _ensure_open(self) -> None:
+        if self._closed:
+            msg = "Write buffer is closed."
+            raise RuntimeError(msg)
+
+    async def _safe_flush(self) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            self._logger.exception("Failed to flush write buffer")
@@ -0,0 +1,25 @@
+import asyncio
+
+from app.dependencies.dependency_container import DependencyContainer
+from app.workers.base import WorkerBase
+
+
+class FlushWorker(WorkerBase):
+    def __init__(self, container: DependencyContainer, metrics_interval: float = 60.0) -> None:
+        self._editions = container.editions
+        self._logger = container.logger
+        self._metrics_interval = metrics_interval
+
+    async def run(self) -> None:
+        await asyncio.gather(
+            *(edition.write_buffer.run() for edition in self._editions),
+            self._report_metrics(),
+        )
+
+    async def _report_metrics(self) -> None:
+        """Раз в `metrics_interval` секунд пишет в журнал метрики буферов записи."""
+        while True:
+            await asyncio.sleep(self._metrics_interval)
+
+            for edition in self._editions:
+                self._logger.info("[%s] Write buffer metrics: %s", edition.language, edition.write_buffer.metrics())
@@ -0,0 +1,20 @@
+import asyncio
+
+from app.dependencies.dependency_container import DependencyContainer
+from app.workers.base import WorkerBase
+
+
+class MetricsWorker(WorkerBase):
+    """Раз в `interval` секунд пишет в журнал метрики предохранителей: состояние и число переходов."""
+
+    def __init__(self, container: DependencyContainer, interval: float = 60.0) -> None:
+        self._circuit_breakers = container.circuit_breakers
+        self._logger = container.logger
+        self._interval = interval
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+
+            for metrics in self._circuit_breakers.metrics():
+                self._logger.info("Circuit breaker metrics: %s", metrics)
@@ -1,62 +1,272 @@
 import asyncio
+from collections.abc import Iterator
+from itertools import cycle
 
 from app.dependencies.dependency_container import DependencyContainer
-from app.models.page import LinkedPages, Page, PageStatus
+from app.dependencies.editions import WikiEdition
+from app.models.page import Page, PageLinks, PageStatus
 from app.services.links import LinkPreprocessor
+from app.services.retries import CircuitOpenError, full_jitter_backoff
 from app.workers.base import WorkerBase
 
 
 class PageWorker(WorkerBase):
-    def __init__(self, container: DependencyContainer) -> None:
-        self._wiki_fetchers = container.fetchers_container.wiki_fetchers
-        self._page_repository = container.graph_repository_container.page_repository
+    _OUTAGE_BASE_DELAY = 1.0
+    _OUTAGE_MAX_DELAY = 60.0
+
+    def __init__(self, container: DependencyContainer, offset: int = 0, idle_delay: float = 5.0) -> None:
+        self._editions = container.editions
+        self._offset = offset
+        self._idle_delay = idle_delay
+        self._retry_policy = container.retry_policy
         self._logger = container.logger
+        self._outage_attempts = 0
 
     async def run(self) -> None:
-        while True:
-            pages: list[Page] = await self._page_repository.get_pages_without_links()
+        idle_editions = 0
+
+        for edition in self._round_robin():
+            pages = await self._claim_pages(edition) if self._is_host_available(edition) else []
+
+            if pages is None:
+                continue
+
+            if pages:
+                idle_editions = 0
+                await self._process_pages(edition, pages)
+                continue
+
+            idle_editions += 1
+            if idle_editions >= len(self._editions):
+                idle_editions = 0
+                await asyncio.sleep(self._idle_delay)
+
+    def _round_robin(self) -> Iterator[WikiEdition]:
+        """Языковые разделы по кругу. Смещение разводит воркеры по разным разделам."""
+        offset = self._offset % len(self._editions)
+        return cycle(self._editions[offset:] + self._editions[:offset])
 
-            try:
-                await self._process_pages(pages)
-            except Exception:
-                self._logger.exception("Failed to process pages")
+    async def _claim_pages(self, edition: WikiEdition) -> list[Page] | None:
+        r"""
+        Забирает страницы раздела в обработку.
 
-                for page in pages:
-                    await self._page_repository.update_page_status(page=page, status=PageStatus.failed)
+        :return: Страницы \ Ничего, если база недоступна. В этом случае воркер уже выждал паузу.
+        """
+        try:
+            pages: list[Page] = await edition.page_repository.get_pages_without_links()
+        except CircuitOpenError as e:
+            await self._park(e)
+            return None
+        except Exception:
+            self._logger.exception("[%s] Failed to claim pages", edition.language)
+            await self._back_off(edition)
+            return None
+
+        self._outage_attempts = 0
+        return pages
 
-    async def _process_pages(self, pages: list[Page]) -> None:
-        if not pages:
-            await asyncio.sleep(5)
+    async def _process_pages(self, edition: WikiEdition, pages: list[Page]) -> None:
+        """
+        Обрабатывает взятые страницы раздела параллельно. Страница ждёт, пока буфер запишет её данные,
+        поэтому при обработке по одной странице буфер почти никогда не набирал бы `max_rows` строк
+        и сбрасывался бы только по таймеру.
+
+        Если обработка страницы упала, неудачная попытка записывается только для неё.
+        Если хост раздела стал недоступен, необработанные страницы возвращаются в очередь без учёта попытки.
+        """
+        canonical_titles = await self._canonical_titles(edition, pages)
+        if canonical_titles is None:
             return
 
-        for page in pages:
-            await self._process_page(page)
+        await asyncio.gather(*(self._handle_page(edition, page, canonical_titles[page.title]) for page in pages))
 
-    async def _process_page(self, page: Page) -> None:
+    async def _handle_page(self, edition: WikiEdition, page: Page, canonical_title: str) -> None:
         try:
-            page_html = await self._wiki_fetchers.fetch_wiki_page(page.title)
+            while not await self._try_process_page(edition, page, canonical_title):
+                pass
+        except CircuitOpenError as e:
+            self._logger.warning(
+                "[Worker %s] [%s] Host is unavailable, releasing page '%s': %s",
+                id(self), edition.language, page.title, e,
+            )
+            await self._release_pages(edition, [page])
+        except Exception as e:
+            self._logger.exception("[%s] Failed to process page '%s'", edition.language, page.title)
+            await self._fail_page(edition, page, repr(e))
 
-            if page_html is None:
-                await self._page_repository.update_page_status(page=page, status=PageStatus.success)
-                return
+    async def _canonical_titles(self, edition: WikiEdition, pages: list[Page]) -> dict[str, str] | None:
+        r"""
+        Разрешает редиректы всех взятых страниц одним запросом к API, а не отдельным запросом на страницу.
 
+        :return: Канонические заголовки страниц \ Ничего, если разрешить не удалось. В этом случае
+                 страницы уже возвращены в очередь.
+        """
+        try:
+            return await edition.redirect_resolver.canonical_titles([page.title for page in pages])
+        except CircuitOpenError as e:
+            self._logger.warning(
+                "[Worker %s] [%s] Host is unavailable, skipping edition: %s", id(self), edition.language, e,
+            )
         except Exception:
-            await self._page_repository.update_page_status(page=page, status=PageStatus.success)
-            self._logger.exception("Failed to fetch wiki page")
+            self._logger.exception("[%s] Failed to resolve redirects of claimed pages", edition.language)
+
+        await self._release_pages(edition, pages)
+        return None
+
+    async def _try_process_page(self, edition: WikiEdition, page: Page, canonical_title: str) -> bool:
+        """
+        Обрабатывает страницу. Если разомкнут предохранитель базы - ждёт его восстановления.
+
+        :return: Обработана ли страница. `False` означает, что её нужно обработать повторно.
+        :raises CircuitOpenError: Если разомкнут предохранитель хоста раздела.
+        """
+        try:
+            await self._process_page(edition, page, canonical_title)
+        except CircuitOpenError as e:
+            if self._is_host_outage(edition, e):
+                raise
+            await self._park(e)
+            return False
+        return True
+
+    @staticmethod
+    def _is_host_available(edition: WikiEdition) -> bool:
+        breaker = edition.http_client.circuit_breaker
+        return breaker is None or breaker.retry_after == 0
+
+    @staticmethod
+    def _is_host_outage(edition: WikiEdition, error: CircuitOpenError) -> bool:
+        breaker = edition.http_client.circuit_breaker
+        return breaker is not None and error.name == breaker.name
+
+    async def _release_pages(self, edition: WikiEdition, pages: list[Page]) -> None:
+        """Возвращает взятые в обработку страницы в статус `open` без учёта попытки."""
+        for page in pages:
+            while not await self._release_page(edition, page):
+                pass
+
+    async def _release_page(self, edition: WikiEdition, page: Page) -> bool:
+        """
+        Возвращает страницу в статус `open`.
+
+        :return: Удалось ли вернуть страницу. Если база недоступна, воркер ждёт перед повторной попыткой.
+        """
+        try:
+            await edition.page_repository.update_page_status(page=page, status=PageStatus.open)
+        except CircuitOpenError as e:
+            await self._park(e)
+            return False
+        except Exception:
+            self._logger.exception("[%s] Failed to release page '%s'", edition.language, page.title)
+            await self._back_off(edition)
+            return False
+        return True
+
+    async def _park(self, error: CircuitOpenError) -> None:
+        self._logger.warning("[Worker %s] Parked for %.1fs: %s", id(self), error.retry_after, error)
+        await asyncio.sleep(error.retry_after)
+
+    async def _back_off(self, edition: WikiEdition) -> None:
+        """
+        Ожидание после ошибки базы раздела, при которой предохранитель ещё замкнут
+        (например, `ServiceUnavailable` при перезапуске Neo4j). Задержка растёт с каждой ошибкой подряд.
+        """
+        delay = full_jitter_backoff(self._outage_attempts, self._OUTAGE_BASE_DELAY, self._OUTAGE_MAX_DELAY)
+        self._outage_attempts += 1
+
+        self._logger.warning(
+            "[Worker %s] [%s] Database is unavailable, backing off for %.1fs.", id(self), edition.language, delay,
+        )
+        await asyncio.sleep(delay)
+
+    async def _process_page(self, edition: WikiEdition, page: Page, canonical_title: str) -> None:
+        if await self._collapse_redirect(edition, page, canonical_title):
+            return
+
+        page_html = await self._fetch_page(edition, page)
+        if page_html is None:
             return
 
         link_preprocessor = LinkPreprocessor(page=page_html)
-        page_names: list[str] = link_preprocessor.preprocess()
+        page_names: list[str] = await edition.redirect_resolver.resolve_many(link_preprocessor.preprocess())
 
-        linked_pages: list[LinkedPages] = [
-            LinkedPages(main_page=page, secondary_page=Page(title=name))
-            for name in page_names
-        ]
+        links = PageLinks(source=page.title, targets=page_names)
 
-        await self._page_repository.create_pages_and_links(*linked_pages, batch_size=10)
+        await edition.write_buffer.add_links(page=page, links=links, status=PageStatus.success)
         self._logger.info(
-            "[Worker %s] Created %d pages. From page: %s",
-            id(self), len(linked_pages), page.title,
+            "[Worker %s] [%s] Created %d pages. From page: %s",
+            id(self), edition.language, len(page_names), page.title,
         )
 
-        await self._page_repository.update_page_status(page=page, status=PageStatus.success)
+    @staticmethod
+    async def _collapse_redirect(edition: WikiEdition, page: Page, canonical_title: str) -> bool:
+        """
+        Сливает страницу-редирект с канонической страницей.
+
+        :return: Была ли страница редиректом.
+        """
+        if canonical_title == page.title:
+            return False
+
+        await edition.page_repository.collapse_redirect(alias=page, canonical=Page(title=canonical_title))
+        return True
+
+    async def _fetch_page(self, edition: WikiEdition, page: Page) -> str | None:
+        r"""
+        Загружает страницу. Неудачная загрузка сохраняется как неудачная попытка обработки.
+
+        :return: HTML страницы \ Ничего, если загрузить не удалось.
+        :raises CircuitOpenError: Если предохранитель хоста разомкнут.
+        """
+        try:
+            page_html = await edition.wiki_fetchers.fetch_wiki_page(page.title)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            self._logger.exception("Failed to fetch wiki page")
+            await self._fail_page(edition, page, repr(e))
+            return None
+
+        if page_html is None:
+            await self._fail_page(edition, page, "Wikipedia page was not fetched.")
+        return page_html
+
+    async def _fail_page(self, edition: WikiEdition, page: Page, error: str) -> None:
+        """
+        Сохраняет неудачную попытку обработки страницы. Пока база недоступна, воркер ждёт и повторяет запись,
+        иначе страница навсегда осталась бы в статусе `in_progress`.
+        """
+        while not await self._try_fail_page(edition, page, error):
+            pass
+
+    async def _try_fail_page(self, edition: WikiEdition, page: Page, error: str) -> bool:
+        """
+        Записывает неудачную попытку обработки страницы один раз.
+
+        :return: Удалось ли записать попытку. `False` означает, что запись нужно повторить.
+        """
+        failed_page = page.model_copy(update={"attempts": page.attempts + 1})
+        next_retry_at = self._retry_policy.next_retry_at(failed_page.attempts)
+        status = PageStatus.failed if next_retry_at is not None else PageStatus.dead
+
+        try:
+            await edition.page_repository.record_page_failure(
+                page=failed_page,
+                status=status,
+                last_error=error,
+                next_retry_at=next_retry_at,
+            )
+        except CircuitOpenError as e:
+            await self._park(e)
+            return False
+        except Exception:
+            self._logger.exception("[%s] Failed to record failure of page '%s'", edition.language, page.title)
+            await self._back_off(edition)
+            return False
+
+        if status == PageStatus.dead:
+            self._logger.warning(
+                "[%s] Page '%s' was dead-lettered after %d attempts.",
+                edition.language, page.title, failed_page.attempts,
+            )
+        return True
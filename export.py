@@ -0,0 +1,18 @@
+import argparse
+
+from app.core.factory import AppFactory
+
+app = AppFactory()
+app.configure_dependency_container()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the page graph to gzipped CSV chunks.")
+    parser.add_argument(
+        "output_dir",
+        help="Directory for chunks and the resumable export state. "
+             "The first crawl language is exported here, the others to <output_dir>/<language>.",
+    )
+    args = parser.parse_args()
+
+    app.export(args.output_dir)
@@ -0,0 +1,19 @@
+import argparse
+
+from app.core.factory import AppFactory
+
+app = AppFactory()
+app.configure_dependency_container()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rebuild the page graph from captured raw pages. "
+                    "Outgoing links of every replayed page are replaced with the links found by the current "
+                    "extraction rules; link targets are canonicalized with the redirects recorded at capture time.",
+    )
+    parser.add_argument("capture_dir", nargs="?", default=app.settings.capture.capture_dir,
+                        help="Root directory of capture segments (<capture_dir>/<language>/segment-*.log).")
+    args = parser.parse_args()
+
+    app.replay(args.capture_dir)
@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from neo4j.exceptions import ServiceUnavailable
+
+from app.models.page import Page, PageLinks, PageStatus
+from app.services.retries import CircuitBreaker, CircuitState, RetryPolicy
+from app.workers.page_worker import PageWorker
+
+
+class _RestartingRepository:
+    """
+    Репозиторий, база которого перезапускается: первые `outages[метод]` обращений к методу падают.
+    Первый успешный захват выдаёт `pages`, следующие - пустой список.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, pages: list[Page], outages: dict[str, int]) -> None:
+        self._breaker = breaker
+        self._pages = pages
+        self._outages = outages
+        self.claims = 0
+        self.failures: list[tuple[str, PageStatus]] = []
+        self.released: list[str] = []
+        self.drained = asyncio.Event()
+
+    async def _call(self, method: str) -> None:
+        async with self._breaker.protect(lambda error: isinstance(error, ServiceUnavailable)):
+            if self._outages.get(method, 0) > 0:
+                self._outages[method] -= 1
+                msg = "Connection refused"
+                raise ServiceUnavailable(msg)
+
+    async def get_pages_without_links(self) -> list[Page]:
+        self.claims += 1
+        await self._call("get_pages_without_links")
+
+        pages, self._pages = self._pages, []
+        if not pages:
+            self.drained.set()
+        return pages
+
+    async def record_page_failure(self, page: Page, status: PageStatus, last_error: str, next_retry_at: float) -> None:
+        await self._call("record_page_failure")
+        self.failures.append((page.title, status))
+
+    async def update_page_status(self, page: Page, status: PageStatus) -> None:
+        await self._call("update_page_status")
+        if status == PageStatus.open:
+            self.released.append(page.title)
+
+
+class _FailingFetchers:
+    async def fetch_wiki_page(self, page_name: str) -> str:
+        msg = "Page was not fetched."
+        raise RuntimeError(msg)
+
+
+class _UnavailableHostFetchers:
+    """Хост отвечает 503: первая ошибка размыкает предохранитель, дальше запросы отклоняются."""
+
+    def __init__(self, breaker: CircuitBreaker) -> None:
+        self._breaker = breaker
+
+    async def fetch_wiki_page(self, page_name: str) -> str:
+        async with self._breaker.protect():
+            msg = f"503 for {page_name}"
+            raise RuntimeError(msg)
+
+
+class _PageFetchers:
+    async def fetch_wiki_page(self, page_name: str) -> str:
+        return f'<a href="/wiki/{page_name}_target">{page_name}</a>'
+
+
+class _WriteBuffer:
+    """Буфер записи, транзакция которого падает на страницах из `failing`."""
+
+    def __init__(self, failing: set[str]) -> None:
+        self._failing = failing
+        self.written: list[str] = []
+
+    async def add_links(self, page: Page, links: PageLinks, status: PageStatus) -> None:
+        if page.title in self._failing:
+            msg = "Transaction failed"
+            raise RuntimeError(msg)
+        self.written.append(page.title)
+
+
+class _DurableWriteBuffer:
+    """Буфер записи, который подтверждает запись только когда в нём накопится `expected` страниц."""
+
+    def __init__(self, expected: int) -> None:
+        self._expected = expected
+        self._filled = asyncio.Event()
+        self.written: list[str] = []
+
+    async def add_links(self, page: Page, links: PageLinks, status: PageStatus) -> None:
+        self.written.append(page.title)
+        if len(self.written) >= self._expected:
+            self._filled.set()
+        await self._filled.wait()
+
+
+class _Resolver:
+    def __init__(self) -> None:
+        self.requests: list[list[str]] = []
+
+    async def canonical_titles(self, titles: list[str]) -> dict[str, str]:
+        self.requests.append(titles)
+        return {title: title for title in titles}
+
+    async def resolve_many(self, titles: list[str]) -> list[str]:
+        return titles
+
+
+class PageWorkerOutageTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.breaker = CircuitBreaker(name="neo4j", logger=logging.getLogger(__name__), failure_threshold=5)
+
+    def _worker(
+            self,
+            repository: _RestartingRepository,
+            wiki_fetchers: object | None = None,
+            host_breaker: CircuitBreaker | None = None,
+            write_buffer: _WriteBuffer | _DurableWriteBuffer | None = None,
+            resolver: _Resolver | None = None,
+            idle_delay: float = 5.0,
+    ) -> PageWorker:
+        edition = SimpleNamespace(
+            language="ru",
+            http_client=SimpleNamespace(circuit_breaker=host_breaker),
+            page_repository=repository,
+            wiki_fetchers=wiki_fetchers or _FailingFetchers(),
+            redirect_resolver=resolver or _Resolver(),
+            write_buffer=write_buffer,
+        )
+        container = SimpleNamespace(
+            editions=[edition],
+            retry_policy=RetryPolicy(max_attempts=5, base_delay=30, max_delay=3600),
+            logger=logging.getLogger(__name__),
+        )
+        return PageWorker(container, idle_delay=idle_delay)  # type: ignore
+
+    async def _run_until(self, worker: PageWorker, event: asyncio.Event) -> None:
+        task = asyncio.create_task(worker.run())
+        try:
+            await asyncio.wait_for(event.wait(), timeout=5)
+            self.assertFalse(task.done(), "worker stopped during the database outage")
+        finally:
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+    async def test_claim_survives_database_restart_with_closed_breaker(self) -> None:
+        repository = _RestartingRepository(self.breaker, pages=[], outages={"get_pages_without_links": 3})
+        worker = self._worker(repository)
+
+        with mock.patch("app.workers.page_worker.full_jitter_backoff", return_value=0) as backoff:
+            await self._run_until(worker, repository.drained)
+
+        self.assertEqual(repository.claims, 4)
+        self.assertEqual(self.breaker.state, CircuitState.closed)
+        self.assertEqual([call.args[0] for call in backoff.call_args_list], [0, 1, 2])
+
+    async def test_failure_is_recorded_after_database_restart(self) -> None:
+        repository = _RestartingRepository(
+            self.breaker, pages=[Page(title="A"), Page(title="B")], outages={"record_page_failure": 1},
+        )
+        worker = self._worker(repository)
+
+        with mock.patch("app.workers.page_worker.full_jitter_backoff", return_value=0) as backoff:
+            await self._run_until(worker, repository.drained)
+
+        self.assertEqual(backoff.call_count, 1)
+        self.assertCountEqual(repository.failures, [("A", PageStatus.failed), ("B", PageStatus.failed)])
+
+    async def test_host_outage_releases_pages_and_skips_edition(self) -> None:
+        host_breaker = CircuitBreaker(
+            name="ru.wikipedia.org", logger=logging.getLogger(__name__), failure_threshold=1, recovery_timeout=60,
+        )
+        repository = _RestartingRepository(
+            self.breaker, pages=[Page(title="A"), Page(title="B"), Page(title="C")], outages={},
+        )
+        worker = self._worker(repository, _UnavailableHostFetchers(host_breaker), host_breaker, idle_delay=0)
+
+        task = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        self.assertEqual(repository.failures, [("A", PageStatus.failed)])
+        self.assertEqual(repository.released, ["B", "C"])
+        self.assertEqual(repository.claims, 1)
+
+    async def test_processing_error_fails_only_the_failed_page(self) -> None:
+        repository = _RestartingRepository(
+            self.breaker, pages=[Page(title="A"), Page(title="B"), Page(title="C")], outages={},
+        )
+        write_buffer = _WriteBuffer(failing={"B"})
+        resolver = _Resolver()
+        worker = self._worker(repository, _PageFetchers(), write_buffer=write_buffer, resolver=resolver)
+
+        await self._run_until(worker, repository.drained)
+
+        self.assertEqual(resolver.requests[0], ["A", "B", "C"])
+        self.assertEqual(write_buffer.written, ["A", "C"])
+        self.assertEqual(repository.failures, [("B", PageStatus.failed)])
+        self.assertEqual(repository.released, [])
+
+    async def test_claimed_pages_wait_for_the_write_buffer_together(self) -> None:
+        repository = _RestartingRepository(
+            self.breaker, pages=[Page(title="A"), Page(title="B"), Page(title="C")], outages={},
+        )
+        write_buffer = _DurableWriteBuffer(expected=3)
+        worker = self._worker(repository, _PageFetchers(), write_buffer=write_buffer)
+
+        await self._run_until(worker, repository.drained)
+
+        self.assertCountEqual(write_buffer.written, ["A", "B", "C"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.dependencies.services.sqlite.repository import SQLitePageRepository
+from app.dependencies.services.sqlite.sqlite_connection import SQLiteConfig, SQLiteConnection
+from app.services.capture import CaptureLog, read_records
+from app.services.replay import Replayer, latest_records
+from app.services.write_buffer import PageWriteBuffer
+
+
+class LatestRecordsTest(unittest.IsolatedAsyncioTestCase):
+    async def test_only_latest_capture_of_each_page_is_replayed(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            first_run = CaptureLog(directory)
+            await first_run.append("A", "old")
+            await first_run.append("B", "only")
+            await first_run.append("A", "newer")
+            await first_run.close()
+
+            second_run = CaptureLog(directory)
+            await second_run.append("A", "newest")
+            await second_run.close()
+
+            records = latest_records(Path(directory))
+            pages = {title: body for path, offsets in records.items() for title, _, body in read_records(path, offsets)}
+
+        self.assertEqual(pages, {"A": "newest", "B": "only"})
+        self.assertEqual([len(offsets) for offsets in records.values()], [1, 1])
+
+
+class ReplayTest(unittest.IsolatedAsyncioTestCase):
+    async def test_replay_replaces_links_and_canonicalizes_targets(self) -> None:
+        logger = logging.getLogger(__name__)
+
+        with tempfile.TemporaryDirectory() as directory:
+            capture_log = CaptureLog(Path(directory) / "ru")
+            await capture_log.append("A", '<a href="/wiki/B">B</a> <a href="/wiki/Old_C">C</a>')
+            await capture_log.append_redirects({"Old_C": "C"})
+            await capture_log.close()
+
+            connection = SQLiteConnection(SQLiteConfig(path=str(Path(directory) / "graph.sqlite3")), logger)
+            repository = SQLitePageRepository(connection, logger)
+            await repository.save_links_and_statuses([("A", "Stale"), ("A", "B")], [])
+
+            edition = SimpleNamespace(language="ru", write_buffer=PageWriteBuffer(repository, logger))
+            await Replayer(editions=[edition], logger=logger, max_workers=1).replay(directory)  # type: ignore
+
+            links = connection.connection.execute("SELECT src, dst FROM links ORDER BY dst").fetchall()
+            await connection.close()
+
+        self.assertEqual(links, [("A", "B"), ("A", "C")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from unittest import mock
+
+from app.services.retries import CircuitOpenError, async_retries
+
+
+class AsyncRetriesTest(unittest.IsolatedAsyncioTestCase):
+    async def test_last_error_is_raised_after_all_attempts(self) -> None:
+        calls = 0
+
+        @async_retries(num_retries=3, timeout=1, exception=ConnectionError)
+        async def connect() -> str:
+            nonlocal calls
+            calls += 1
+            msg = "Connection refused"
+            raise ConnectionError(msg)
+
+        with mock.patch("app.services.retries.asyncio.sleep") as sleep, self.assertRaises(ConnectionError):
+            await connect()
+
+        self.assertEqual(calls, 3)
+        self.assertEqual(sleep.await_count, 2)
+
+    async def test_open_breaker_is_waited_out(self) -> None:
+        errors = [CircuitOpenError("neo4j", retry_after=7.5)]
+
+        @async_retries(num_retries=2, timeout=1, exception=ConnectionError)
+        async def connect() -> str:
+            if errors:
+                raise errors.pop()
+            return "connected"
+
+        with mock.patch("app.services.retries.asyncio.sleep") as sleep:
+            self.assertEqual(await connect(), "connected")
+
+        sleep.assert_awaited_once_with(7.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import unittest
+
+from app.models.page import Page, PageLinks, PageStatus
+from app.services.batch_size import AdaptiveBatchSize
+from app.services.write_buffer import FlushPolicy, PageWriteBuffer
+
+
+class _FlakyRepository:
+    """Репозиторий, у которого падают транзакции с номерами из `failing_calls` (с единицы)."""
+
+    def __init__(self, failing_calls: set[int]) -> None:
+        self._failing_calls = failing_calls
+        self._calls = 0
+        self.transactions: list[tuple[list[tuple[str, str]], list[tuple[str, PageStatus]]]] = []
+
+    async def save_links_and_statuses(self, links, statuses, replaced_sources=()) -> None:
+        await asyncio.sleep(0)
+        self._calls += 1
+        if self._calls in self._failing_calls:
+            msg = "Deadlock detected"
+            raise RuntimeError(msg)
+        self.transactions.append((list(links), list(statuses)))
+
+    @property
+    def links(self) -> list[tuple[str, str]]:
+        return sorted(row for links, _ in self.transactions for row in links)
+
+    @property
+    def statuses(self) -> list[str]:
+        return sorted(title for _, statuses in self.transactions for title, _ in statuses)
+
+
+class PageWriteBufferRetryTest(unittest.IsolatedAsyncioTestCase):
+    def _buffer(self, repository: _FlakyRepository, batch_size: AdaptiveBatchSize, concurrency: int) -> PageWriteBuffer:
+        return PageWriteBuffer(
+            page_repository=repository,
+            logger=logging.getLogger(__name__),
+            policy=FlushPolicy(max_concurrency=concurrency),
+            batch_size=batch_size,
+        )
+
+    async def _add(self, buffer: PageWriteBuffer, links: dict[str, list[str]]) -> list[asyncio.Task[None]]:
+        tasks = [
+            asyncio.create_task(buffer.add_links(
+                page=Page(title=source),
+                links=PageLinks(source=source, targets=targets),
+                status=PageStatus.success,
+            ))
+            for source, targets in links.items()
+        ]
+        await asyncio.sleep(0)
+        return tasks
+
+    async def test_failed_chunks_are_retried_with_smaller_batches(self) -> None:
+        repository = _FlakyRepository(failing_calls={1, 2})
+        buffer = self._buffer(repository, AdaptiveBatchSize(initial_size=4, min_size=1, max_size=4), concurrency=2)
+        tasks = await self._add(buffer, {"A": ["a"], "B": ["b"], "C": ["c"], "D": ["d"]})
+
+        await buffer.flush()
+        await asyncio.gather(*tasks)
+
+        self.assertEqual(repository.links, [("A", "a"), ("B", "b"), ("C", "c"), ("D", "d")])
+        self.assertEqual(repository.statuses, ["A", "B", "C", "D"])
+        self.assertEqual([len(links) for links, _ in repository.transactions[:2]], [1, 1])
+        self.assertEqual(buffer.metrics()["retried_rows"], 8)
+
+    async def test_page_links_and_status_are_written_in_one_transaction(self) -> None:
+        repository = _FlakyRepository(failing_calls={2})
+        buffer = self._buffer(repository, AdaptiveBatchSize(initial_size=2, min_size=2, max_size=2), concurrency=1)
+        page_a, page_b = await self._add(buffer, {"A": ["w", "x"], "B": ["y", "z"]})
+
+        with self.assertRaises(RuntimeError):
+            await buffer.flush()
+
+        await page_a
+        with self.assertRaises(RuntimeError):
+            await page_b
+
+        self.assertEqual(repository.transactions, [([("A", "w"), ("A", "x")], [("A", PageStatus.success)])])
+
+    async def test_failure_at_minimum_size_is_reported_to_waiters(self) -> None:
+        repository = _FlakyRepository(failing_calls=set(range(1, 100)))
+        buffer = self._buffer(repository, AdaptiveBatchSize(initial_size=4, min_size=1, max_size=4), concurrency=2)
+        tasks = await self._add(buffer, {"A": ["a"], "B": ["b"]})
+
+        with self.assertRaises(RuntimeError):
+            await buffer.flush()
+
+        for task in tasks:
+            with self.assertRaises(RuntimeError):
+                await task
+        self.assertEqual(repository.transactions, [])
+
+
+if __name__ == "__main__":
+    unittest.main()